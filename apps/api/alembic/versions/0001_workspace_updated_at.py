@@ -0,0 +1,32 @@
+"""Add workspaces.updated_at
+
+Revision ID: 0001_workspace_updated_at
+Revises:
+Create Date: 2026-10-15 14:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001_workspace_updated_at"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    columns = {column["name"] for column in sa.inspect(op.get_bind()).get_columns("workspaces")}
+    if "updated_at" in columns:
+        return
+    op.add_column("workspaces", sa.Column("updated_at", sa.DateTime(), nullable=True))
+    # Existing workspaces start out as last updated when they were created
+    op.execute("UPDATE workspaces SET updated_at = created_at")
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("workspaces") as batch_op:
+        batch_op.drop_column("updated_at")
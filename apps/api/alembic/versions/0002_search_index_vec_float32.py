@@ -0,0 +1,64 @@
+"""Store search_index.vec as a packed float32 blob instead of JSON
+
+Revision ID: 0002_search_index_vec_float32
+Revises: 0001_workspace_updated_at
+Create Date: 2026-10-15 14:05:00
+
+"""
+from array import array
+import json
+import sys
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002_search_index_vec_float32"
+down_revision: Union[str, None] = "0001_workspace_updated_at"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _pack(values) -> bytes:
+    # Same layout as models.Float32Vector: little-endian float32
+    packed = array("f", values)
+    if sys.byteorder != "little":
+        packed.byteswap()
+    return packed.tobytes()
+
+
+def _unpack(blob: bytes) -> list:
+    unpacked = array("f")
+    unpacked.frombytes(blob)
+    if sys.byteorder != "little":
+        unpacked.byteswap()
+    return unpacked.tolist()
+
+
+def _vec_is_blob() -> bool:
+    columns = {column["name"]: column["type"] for column in sa.inspect(op.get_bind()).get_columns("search_index")}
+    return isinstance(columns["vec"], sa.LargeBinary)
+
+
+def _convert(new_type, convert) -> None:
+    bind = op.get_bind()
+    op.add_column("search_index", sa.Column("vec_new", new_type, nullable=True))
+    table = sa.table("search_index", sa.column("id"), sa.column("vec"), sa.column("vec_new", new_type))
+    rows = bind.execute(sa.select(table.c.id, table.c.vec).where(table.c.vec.is_not(None))).all()
+    for row_id, value in rows:
+        bind.execute(table.update().where(table.c.id == row_id).values(vec_new=convert(value)))
+    with op.batch_alter_table("search_index") as batch_op:
+        batch_op.drop_column("vec")
+        batch_op.alter_column("vec_new", new_column_name="vec")
+
+
+def upgrade() -> None:
+    if _vec_is_blob():
+        return
+    _convert(sa.LargeBinary(), lambda value: _pack(json.loads(value) if isinstance(value, str) else value))
+
+
+def downgrade() -> None:
+    _convert(sa.JSON(), _unpack)
@@ -0,0 +1,109 @@
+"""Raw Download.hash digests, recency/metrics indexes, AITaskMetric enums
+
+Revision ID: 0003_download_hash_indexes_enums
+Revises: 0002_search_index_vec_float32
+Create Date: 2026-10-15 14:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003_download_hash_indexes_enums"
+down_revision: Union[str, None] = "0002_search_index_vec_float32"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TASK_STATUS = sa.Enum("success", "error", "unknown", name="ai_task_status")
+COST_TIER = sa.Enum("low", "medium", "high", name="ai_cost_tier")
+ERRORS_WHERE = sa.text("status = 'error' AND error IS NOT NULL")
+
+# name -> (table, columns, dialect kwargs)
+INDEXES = {
+    "ix_tabs_workspace_created": ("tabs", ["workspace_id", sa.text("created_at DESC")], {}),
+    "ix_notes_workspace_created": ("notes", ["workspace_id", sa.text("created_at DESC")], {}),
+    "ix_runs_workspace_started": ("runs", ["workspace_id", sa.text("started_at DESC")], {}),
+    "ix_ai_task_metrics_ts_kind_mode_client": (
+        "ai_task_metrics",
+        ["timestamp", "kind", "mode", "client_id"],
+        {},
+    ),
+    "ix_ai_task_metrics_errors": (
+        "ai_task_metrics",
+        ["timestamp"],
+        {"postgresql_where": ERRORS_WHERE, "sqlite_where": ERRORS_WHERE},
+    ),
+}
+
+
+def _index_names(table: str) -> set:
+    return {index["name"] for index in sa.inspect(op.get_bind()).get_indexes(table)}
+
+
+def _column_type(table: str, name: str):
+    columns = {column["name"]: column["type"] for column in sa.inspect(op.get_bind()).get_columns(table)}
+    return columns[name]
+
+
+def _hex_to_digest(value):
+    if isinstance(value, (bytes, memoryview)):
+        return bytes(value)
+    try:
+        digest = bytes.fromhex(value)
+    except ValueError:
+        return None
+    return digest if len(digest) == 32 else None
+
+
+def _convert_hash(new_type, convert) -> None:
+    bind = op.get_bind()
+    op.add_column("downloads", sa.Column("hash_new", new_type, nullable=True))
+    table = sa.table("downloads", sa.column("id"), sa.column("hash"), sa.column("hash_new", new_type))
+    rows = bind.execute(sa.select(table.c.id, table.c.hash).where(table.c.hash.is_not(None))).all()
+    for row_id, value in rows:
+        bind.execute(table.update().where(table.c.id == row_id).values(hash_new=convert(value)))
+    with op.batch_alter_table("downloads") as batch_op:
+        batch_op.drop_column("hash")
+        batch_op.alter_column("hash_new", new_column_name="hash")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+
+    if not isinstance(_column_type("downloads", "hash"), sa.LargeBinary):
+        _convert_hash(sa.LargeBinary(32), _hex_to_digest)
+    if "ix_downloads_hash" not in _index_names("downloads"):
+        op.create_index("ix_downloads_hash", "downloads", ["hash"])
+
+    for name, (table, columns, kwargs) in INDEXES.items():
+        if name not in _index_names(table):
+            op.create_index(name, table, columns, **kwargs)
+
+    # Values outside the closed vocabularies would not fit the enum types
+    op.execute("UPDATE ai_task_metrics SET status = 'unknown' WHERE status NOT IN ('success', 'error', 'unknown')")
+    op.execute("UPDATE ai_task_metrics SET cost_tier = NULL WHERE cost_tier NOT IN ('low', 'medium', 'high')")
+    # Elsewhere (SQLite) Enum is a plain VARCHAR, so the existing columns already match
+    if bind.dialect.name == "postgresql" and not isinstance(_column_type("ai_task_metrics", "status"), sa.Enum):
+        TASK_STATUS.create(bind, checkfirst=True)
+        COST_TIER.create(bind, checkfirst=True)
+        op.alter_column("ai_task_metrics", "status", type_=TASK_STATUS, postgresql_using="status::ai_task_status")
+        op.alter_column("ai_task_metrics", "cost_tier", type_=COST_TIER, postgresql_using="cost_tier::ai_cost_tier")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+
+    if bind.dialect.name == "postgresql":
+        op.alter_column("ai_task_metrics", "status", type_=sa.String(), postgresql_using="status::text")
+        op.alter_column("ai_task_metrics", "cost_tier", type_=sa.String(), postgresql_using="cost_tier::text")
+        TASK_STATUS.drop(bind, checkfirst=True)
+        COST_TIER.drop(bind, checkfirst=True)
+
+    for name, (table, _, _) in INDEXES.items():
+        op.drop_index(name, table_name=table)
+
+    op.drop_index("ix_downloads_hash", table_name="downloads")
+    _convert_hash(sa.String(), lambda value: bytes(value).hex())
@@ -0,0 +1,55 @@
+"""5-minute rollup materialized view over ai_task_metrics (PostgreSQL only)
+
+Revision ID: 0004_ai_task_metric_rollup_view
+Revises: 0003_download_hash_indexes_enums
+Create Date: 2026-10-15 16:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004_ai_task_metric_rollup_view"
+down_revision: Union[str, None] = "0003_download_hash_indexes_enums"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Read by services.metrics_rollup (ROLLUP_VIEW, ROLLUP_BUCKET_SECONDS = 300)
+VIEW = "ai_task_metric_rollup_5m"
+
+
+def upgrade() -> None:
+    # Elsewhere (SQLite) the timeline endpoint aggregates the raw table instead
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS {VIEW} AS
+        SELECT
+            (floor(extract(epoch FROM timestamp) / 300) * 300)::bigint AS bucket_epoch,
+            kind,
+            coalesce(mode, '') AS mode,
+            provider,
+            model,
+            count(*) AS request_count,
+            sum(CASE WHEN status = 'success' THEN 1 ELSE 0 END) AS success_count,
+            sum(CASE WHEN status = 'error' THEN 1 ELSE 0 END) AS error_count,
+            coalesce(sum(estimated_cost_usd), 0) AS cost_sum,
+            coalesce(sum(total_tokens), 0) AS tokens_sum,
+            sum(latency_ms) AS latency_sum
+        FROM ai_task_metrics
+        GROUP BY 1, 2, 3, 4, 5
+        """
+    )
+    # REFRESH ... CONCURRENTLY requires a unique index covering every row
+    op.execute(
+        f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{VIEW}_key ON {VIEW} (bucket_epoch, kind, mode, provider, model)"
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {VIEW}")
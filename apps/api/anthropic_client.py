@@ -3,16 +3,47 @@ Anthropic Client for FastAPI Backend
 Provides Claude API capabilities
 """
 
-import asyncio
 import json
 import logging
 import os
+import threading
 from typing import AsyncGenerator, Optional, List
 
 import httpx
 
+from apps.api.http_transport import get_shared_transport
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional; stdlib json also accepts bytes
+    _json_loads = json.loads
+
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 logger = logging.getLogger(__name__)
 
+# SSE framing tokens, compared against raw bytes so skipped lines are never decoded
+_DATA_PREFIX = b"data: "
+_DATA_PREFIX_LEN = len(_DATA_PREFIX)
+_DONE = b"[DONE]"
+
+
+def _extract_error(body: bytes, status_code: int) -> str:
+    """Pull the message out of an Anthropic error body (failure path only)"""
+    if not body:
+        return str(status_code)
+    try:
+        error = _json_loads(body).get("error")
+    except (ValueError, AttributeError):
+        return body.decode("utf-8", errors="replace")
+    if isinstance(error, dict):
+        return error.get("message", str(error))
+    return str(error) if error else body.decode("utf-8", errors="replace")
+
 
 class AnthropicClient:
     """Client for Anthropic API (Claude)"""
@@ -25,7 +56,15 @@ class AnthropicClient:
         self.api_key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
         self.base_url = base_url.rstrip("/")
         self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
         self.timeout = 60.0
+        # SSE is one long-lived stream per request, so HTTP/2 framing buys nothing
+        self.http2 = os.getenv("ANTHROPIC_HTTP2", "0") == "1"
+
+    def set_shared_transport(self, transport: httpx.AsyncHTTPTransport) -> None:
+        """Route requests through a process-wide transport (owned by the caller)"""
+        self._transport = transport
+        self._client = None
 
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client"""
@@ -35,22 +74,32 @@ class AnthropicClient:
                 "x-api-key": self.api_key,
                 "anthropic-version": "2023-06-01",
             }
-            self._client = httpx.AsyncClient(
-                timeout=self.timeout,
-                headers=headers,
-                limits=httpx.Limits(
-                    max_keepalive_connections=10,
-                    max_connections=20,
-                    keepalive_expiry=30.0,
-                ),
-                http2=True,  # Use HTTP/2 for better performance
-            )
+            if self._transport is not None:
+                # Pool limits live on the shared transport
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    headers=headers,
+                    transport=self._transport,
+                )
+            else:
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    headers=headers,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32,
+                        max_connections=32,
+                        keepalive_expiry=120.0,
+                    ),
+                    http2=self.http2,
+                )
         return self._client
 
     async def close(self):
         """Close HTTP client"""
         if self._client:
-            await self._client.aclose()
+            # A shared transport is closed by its owner, not by each client
+            if self._transport is None:
+                await self._client.aclose()
             self._client = None
 
     async def check_available(self) -> bool:
@@ -84,23 +133,18 @@ class AnthropicClient:
         try:
             client = await self._get_client()
             
-            # Anthropic expects system and messages format
-            system_message = None
-            anthropic_messages = []
-            
-            for msg in messages:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                
-                if role == "system":
-                    system_message = content
-                else:
-                    # Map roles: user -> user, assistant -> assistant
-                    anthropic_role = "user" if role == "user" else "assistant"
-                    anthropic_messages.append({
-                        "role": anthropic_role,
-                        "content": content,
-                    })
+            # Anthropic expects system and messages format (last system message wins)
+            system_messages = [msg.get("content", "") for msg in messages if msg.get("role") == "system"]
+            system_message = system_messages[-1] if system_messages else None
+            anthropic_messages = [
+                {
+                    # Map roles: user -> user, anything else -> assistant
+                    "role": "user" if msg.get("role", "user") == "user" else "assistant",
+                    "content": msg.get("content", ""),
+                }
+                for msg in messages
+                if msg.get("role") != "system"
+            ]
             
             request_body = {
                 "model": model,
@@ -116,62 +160,71 @@ class AnthropicClient:
             async with client.stream(
                 "POST",
                 f"{self.base_url}/messages",
-                json=request_body,
+                # Pre-encoded body; Content-Type is already a client default header
+                content=_json_dumps(request_body),
+                # aiter_raw() skips content decoding, so ask for an uncompressed stream
+                headers={"Accept-Encoding": "identity"},
                 timeout=60.0,
             ) as response:
                 if not response.is_success:
-                    error_text = await response.aread()
-                    error_msg = error_text.decode() if error_text else str(response.status_code)
-                    try:
-                        error_json = json.loads(error_msg)
-                        if "error" in error_json:
-                            error_msg = error_json["error"].get("message", str(error_json["error"]))
-                    except:
-                        pass
+                    error_msg = _extract_error(await response.aread(), response.status_code)
                     yield {"text": "", "done": True, "error": f"Anthropic error: {error_msg}"}
                     return
 
-                buffer = ""
+                # One reusable buffer; consumed lines are deleted from the front in place
+                buf = bytearray()
                 usage_info: Optional[dict] = None
                 
-                async for chunk in response.aiter_text():
-                    buffer += chunk
-                    lines = buffer.split("\n")
-                    buffer = lines.pop() if lines else ""
-
-                    for line in lines:
-                        line = line.strip()
-                        if not line or not line.startswith("data: "):
+                async for chunk in response.aiter_raw():
+                    buf.extend(chunk)
+                    if b"\n" not in chunk:
+                        continue
+
+                    # Scan complete lines once; only the trailing remainder is retained
+                    start = 0
+                    # Deltas from the same network chunk are coalesced into one yield
+                    pending_text: List[str] = []
+                    finished = False
+                    while True:
+                        idx = buf.find(b"\n", start)
+                        if idx == -1:
+                            break
+                        line = buf[start:idx]
+                        start = idx + 1
+                        if not line.startswith(_DATA_PREFIX):
                             continue
 
-                        # Remove "data: " prefix
-                        data_str = line[6:]
-                        if data_str == "[DONE]":
-                            yield {"text": "", "done": True, "error": None, "usage": usage_info}
-                            return
+                        # Remove "data: " prefix (and a trailing CR from CRLF framing)
+                        data_bytes = line[_DATA_PREFIX_LEN:].rstrip(b"\r")
+                        if data_bytes == _DONE:
+                            finished = True
+                            break
 
                         try:
-                            data = json.loads(data_str)
+                            data = _json_loads(data_bytes)
+                            event_type = data.get("type")
                             
                             # Extract delta content
-                            if data.get("type") == "content_block_delta":
-                                delta = data.get("delta", {})
-                                if "text" in delta:
-                                    text = delta["text"]
-                                    yield {"text": text, "done": False, "error": None}
+                            if event_type == "content_block_delta":
+                                text = (data.get("delta") or {}).get("text")
+                                if text:
+                                    pending_text.append(text)
                             
-                            # Extract usage info
-                            if data.get("type") == "message_stop":
-                                # Usage is in the stop event
+                            # Finished; usage is in the stop event
+                            elif event_type == "message_stop":
                                 usage_info = data.get("usage")
-                            
-                            # Check if finished
-                            if data.get("type") == "message_stop":
-                                yield {"text": "", "done": True, "error": None, "usage": usage_info}
-                                return
+                                finished = True
+                                break
                         except json.JSONDecodeError:
                             continue
 
+                    if pending_text:
+                        yield {"text": "".join(pending_text), "done": False, "error": None}
+                    if finished:
+                        yield {"text": "", "done": True, "error": None, "usage": usage_info}
+                        return
+                    del buf[:start]
+
                 yield {"text": "", "done": True, "error": None, "usage": usage_info}
 
         except httpx.TimeoutException:
@@ -183,6 +236,7 @@ class AnthropicClient:
 
 
 # Global singleton instance
+_anthropic_client_lock = threading.Lock()
 _anthropic_client: Optional[AnthropicClient] = None
 
 
@@ -193,8 +247,14 @@ def get_anthropic_client(
     """Get or create Anthropic client singleton"""
     global _anthropic_client
     if _anthropic_client is None:
-        key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
-        url = base_url or os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1")
-        _anthropic_client = AnthropicClient(api_key=key, base_url=url)
+        # Double-checked so concurrent first calls (e.g. threadpool endpoints) build one client
+        with _anthropic_client_lock:
+            if _anthropic_client is None:
+                key = api_key or os.getenv("ANTHROPIC_API_KEY", "")
+                url = base_url or os.getenv("ANTHROPIC_BASE_URL", "https://api.anthropic.com/v1")
+                _anthropic_client = AnthropicClient(api_key=key, base_url=url)
+                if _anthropic_client.http2:
+                    # The shared transport is HTTP/2; only join it when explicitly opted in
+                    _anthropic_client.set_shared_transport(get_shared_transport())
     return _anthropic_client
 
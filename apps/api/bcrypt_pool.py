@@ -0,0 +1,44 @@
+"""
+Bcrypt worker pool for password hashing/verification
+Keeps ~100ms bcrypt calls off the event loop; bcrypt releases the GIL so threads scale across cores
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from fastapi import HTTPException, status
+
+T = TypeVar("T")
+
+# Beyond this many queued/running operations, shed load instead of queueing
+BCRYPT_MAX_PENDING = int(os.getenv("BCRYPT_MAX_PENDING", "500"))
+
+_pool = ThreadPoolExecutor(
+    max_workers=(os.cpu_count() or 1) * 2,
+    thread_name_prefix="bcrypt",
+)
+# Only touched from the event loop thread, so a plain counter is enough
+_pending = 0
+
+
+def pending_operations() -> int:
+    """Number of bcrypt operations queued or running"""
+    return _pending
+
+
+async def run_in_bcrypt_pool(func: Callable[..., T], *args) -> T:
+    """Run a password hash/verify call on the pool, or 503 when saturated"""
+    global _pending
+    if _pending >= BCRYPT_MAX_PENDING:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Authentication service busy, please retry",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_pool, func, *args)
+    finally:
+        _pending -= 1
@@ -11,6 +11,13 @@ from typing import Any, Optional
 import redis.asyncio as redis
 from redis.exceptions import RedisError
 
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional
+    _json_dumps = json.dumps
+
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 
 try:
@@ -36,7 +43,8 @@ async def cache_get(key: str) -> Optional[str]:
 async def cache_set(key: str, value: Any, ttl_seconds: int = 60) -> None:
     if cache_client is None:
         return
-    encoded = value if isinstance(value, str) else json.dumps(value)
+    # Pre-encoded str/bytes are stored as-is
+    encoded = value if isinstance(value, (str, bytes)) else _json_dumps(value)
     try:
         await cache_client.setex(key, ttl_seconds, encoded)
     except RedisError:
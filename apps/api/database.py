@@ -35,7 +35,24 @@ def get_db():
         db.close()
 
 def init_db():
-    """Initialize database (create tables)"""
+    """
+    Initialize database: create tables on an empty database, then apply
+    pending migrations (apps/api/alembic)
+    """
+    from alembic import command
+    from alembic.config import Config
+    from sqlalchemy import inspect
     from apps.api.models import Base
-    Base.metadata.create_all(bind=engine)
+
+    config = Config(os.path.join(os.path.dirname(__file__), "alembic.ini"))
+    with engine.begin() as connection:
+        config.attributes["connection"] = connection
+        if not inspect(connection).get_table_names():
+            # Revisions skip what create_all already built, so this records them
+            # and adds the objects tables don't cover (e.g. the metrics rollup view)
+            Base.metadata.create_all(bind=connection)
+            command.upgrade(config, "head")
+        else:
+            command.upgrade(config, "head")
+            Base.metadata.create_all(bind=connection)
 
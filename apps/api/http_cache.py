@@ -0,0 +1,37 @@
+"""
+HTTP caching helpers for GET routes
+Weak ETags plus a short private Cache-Control, so repeat navigations revalidate with a 304
+"""
+
+from typing import Optional
+
+from fastapi import Request, Response
+
+PRIVATE_CACHE_CONTROL = "private, max-age=5"
+
+
+def weak_etag(*parts) -> str:
+    """Build a weak ETag from version parts, e.g. weak_etag(id, updated_at_us)"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Weak comparison of If-None-Match against etag (RFC 9110 13.1.2)"""
+    header: Optional[str] = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in header.split(","))
+
+
+def set_cache_headers(response: Response, etag: str) -> None:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = PRIVATE_CACHE_CONTROL
+
+
+def not_modified(etag: str) -> Response:
+    response = Response(status_code=304)
+    set_cache_headers(response, etag)
+    return response
@@ -0,0 +1,39 @@
+"""
+Shared HTTP transport for outbound LLM clients
+One connection pool per process instead of one per client
+"""
+
+import threading
+from typing import Optional
+
+import httpx
+
+# Global shared transport
+_shared_transport_lock = threading.Lock()
+_shared_transport: Optional[httpx.AsyncHTTPTransport] = None
+
+
+def get_shared_transport() -> httpx.AsyncHTTPTransport:
+    """Get or create the process-wide HTTP transport"""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_transport_lock:
+            if _shared_transport is None:
+                _shared_transport = httpx.AsyncHTTPTransport(
+                    http2=True,  # Multiplex concurrent requests to the same host
+                    retries=0,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=32,
+                        max_connections=32,
+                        keepalive_expiry=120.0,
+                    ),
+                )
+    return _shared_transport
+
+
+async def close_shared_transport() -> None:
+    """Close the shared transport (call once on shutdown)"""
+    global _shared_transport
+    if _shared_transport is not None:
+        await _shared_transport.aclose()
+        _shared_transport = None
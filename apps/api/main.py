@@ -9,9 +9,11 @@ from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from apps.api import logging_config
-from apps.api.database import init_db
+from apps.api.database import engine, init_db
+from apps.api.http_transport import close_shared_transport
 from apps.api.middleware import RequestIdMiddleware
 from apps.api.openapi import configure_openapi
 from apps.api.routes import (
@@ -40,6 +42,9 @@ from apps.api.routes import (
     health as health_routes,
 )
 from apps.api.telemetry import init_telemetry
+from apps.api.services.metrics_rollup import start_rollup_refresher, stop_rollup_refresher
+from apps.api.services.metrics_archive import start_metrics_archiver, stop_metrics_archiver
+from apps.api.services.telemetry import start_metric_writer, stop_metric_writer
 
 # WebSocket connection manager
 class ConnectionManager:
@@ -64,14 +69,19 @@ class ConnectionManager:
 manager = ConnectionManager()
 metrics_manager = ConnectionManager()
 metrics_task: asyncio.Task | None = None
+warmup_task: asyncio.Task | None = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("Regen API Server starting...")
     init_db()  # Initialize database tables
-    global metrics_task
+    global metrics_task, warmup_task
     metrics_task = asyncio.create_task(metrics_publisher())
+    warmup_task = asyncio.create_task(health_routes.warm_up())  # /readyz is 503 until done
+    start_rollup_refresher(engine)  # No-op unless running on PostgreSQL (view from migration 0004)
+    start_metric_writer()  # Batch ai_task metric inserts
+    start_metrics_archiver(engine)  # No-op unless AI_METRICS_ARCHIVE_DAYS is set
     yield
     # Shutdown
     print("Regen API Server shutting down...")
@@ -79,6 +89,21 @@ async def lifespan(app: FastAPI):
         metrics_task.cancel()
         with suppress(asyncio.CancelledError):
             await metrics_task
+    if warmup_task:
+        warmup_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await warmup_task
+    await stop_rollup_refresher()
+    await stop_metric_writer()  # Flushes queued metrics
+    await stop_metrics_archiver()
+    await close_shared_transport()
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+
+    _default_response_class = ORJSONResponse
+except ImportError:  # orjson is optional
+    _default_response_class = JSONResponse
 
 logging_config.configure_logging()
 app = FastAPI(
@@ -86,6 +111,7 @@ app = FastAPI(
     description="REST + WebSocket API for Regen",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=_default_response_class,
 )
 configure_openapi(app)
 init_telemetry(app)
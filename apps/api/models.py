@@ -2,14 +2,41 @@
 Database Models - SQLAlchemy
 """
 
-from sqlalchemy import Column, String, Integer, Float, Boolean, JSON, DateTime, Date, ForeignKey, Text, UniqueConstraint
+from sqlalchemy import Column, String, Integer, Float, Boolean, JSON, DateTime, Date, ForeignKey, Text, UniqueConstraint, Index, LargeBinary, Enum
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import text
+from sqlalchemy.types import TypeDecorator
+from array import array
 from datetime import datetime
+import sys
 import uuid
 
 Base = declarative_base()
 
+class Float32Vector(TypeDecorator):
+    """Embedding stored as a packed little-endian float32 blob (4 bytes/dim vs ~10 chars/dim as JSON)"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        packed = array("f", value)
+        if sys.byteorder != "little":
+            packed.byteswap()
+        return packed.tobytes()
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        unpacked = array("f")
+        unpacked.frombytes(value)
+        if sys.byteorder != "little":
+            unpacked.byteswap()
+        return unpacked.tolist()
+
 class User(Base):
     __tablename__ = "users"
     
@@ -34,6 +61,7 @@ class Workspace(Base):
     vpn_profile_id = Column(String, nullable=True)
     settings_json = Column(JSON, default={})
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Also bumped when tabs change
     
     user = relationship("User", back_populates="workspaces")
     tabs = relationship("Tab", back_populates="workspace", cascade="all, delete-orphan")
@@ -52,6 +80,10 @@ class Tab(Base):
     
     workspace = relationship("Workspace", back_populates="tabs")
 
+    __table_args__ = (
+        Index("ix_tabs_workspace_created", workspace_id, created_at.desc()),
+    )
+
 class Note(Base):
     __tablename__ = "notes"
     
@@ -64,6 +96,10 @@ class Note(Base):
     
     workspace = relationship("Workspace", back_populates="notes")
 
+    __table_args__ = (
+        Index("ix_notes_workspace_created", workspace_id, created_at.desc()),
+    )
+
 class Run(Base):
     __tablename__ = "runs"
     
@@ -79,6 +115,11 @@ class Run(Base):
     workspace = relationship("Workspace", back_populates="runs")
     artifacts = relationship("Artifact", back_populates="run", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Runs have no created_at; started_at is their recency column
+        Index("ix_runs_workspace_started", workspace_id, started_at.desc()),
+    )
+
 class Artifact(Base):
     __tablename__ = "artifacts"
     
@@ -99,7 +140,7 @@ class SearchIndex(Base):
     title = Column(String, nullable=True)
     lang = Column(String, default="en")
     chunk_id = Column(String, nullable=True)
-    vec = Column(JSON, nullable=True)  # Vector embedding (as JSON array)
+    vec = Column(Float32Vector, nullable=True)  # Vector embedding (float32 blob, read back as list)
     ts = Column(DateTime, default=datetime.utcnow, index=True)
 
 class Download(Base):
@@ -109,7 +150,7 @@ class Download(Base):
     workspace_id = Column(String, nullable=True, index=True)
     url = Column(String, nullable=False)
     file_path = Column(String, nullable=True)
-    hash = Column(String, nullable=True)  # SHA-256 checksum
+    hash = Column(LargeBinary(32), nullable=True, index=True)  # SHA-256 checksum (raw digest, not hex)
     verdict = Column(String, nullable=True)  # safe, suspicious, malicious
     created_at = Column(DateTime, default=datetime.utcnow)
     completed_at = Column(DateTime, nullable=True)
@@ -119,7 +160,8 @@ class AITaskMetric(Base):
     
     id = Column(String, primary_key=True, default=lambda: str(uuid.uuid4()))
     timestamp = Column(DateTime, default=datetime.utcnow, index=True)
-    status = Column(String, nullable=False, index=True)  # success, error
+    # Closed vocabularies are native enums on PostgreSQL (4-byte values, integer compares)
+    status = Column(Enum("success", "error", "unknown", name="ai_task_status"), nullable=False, index=True)
     kind = Column(String, nullable=False, index=True)  # search, agent, chat, summary
     mode = Column(String, nullable=True, index=True)
     provider = Column(String, nullable=False)
@@ -129,7 +171,7 @@ class AITaskMetric(Base):
     completion_tokens = Column(Integer, nullable=True)
     total_tokens = Column(Integer, nullable=True)
     estimated_cost_usd = Column(Float, nullable=True)
-    cost_tier = Column(String, nullable=True)  # low, medium, high
+    cost_tier = Column(Enum("low", "medium", "high", name="ai_cost_tier"), nullable=True)
     prompt_chars = Column(Integer, nullable=True)
     has_context = Column(Boolean, default=False)
     citations_count = Column(Integer, nullable=True)
@@ -137,6 +179,18 @@ class AITaskMetric(Base):
     error = Column(Text, nullable=True)
     metadata_json = Column(JSON, nullable=True)
 
+    __table_args__ = (
+        # Covers the summary endpoint's window + optional kind/mode/client filters
+        Index("ix_ai_task_metrics_ts_kind_mode_client", timestamp, kind, mode, client_id),
+        # Partial index for the top-errors query; successful rows are never scanned
+        Index(
+            "ix_ai_task_metrics_errors",
+            timestamp,
+            postgresql_where=text("status = 'error' AND error IS NOT NULL"),
+            sqlite_where=text("status = 'error' AND error IS NOT NULL"),
+        ),
+    )
+
 
 class Discipline(Base):
     __tablename__ = "disciplines"
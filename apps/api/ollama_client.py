@@ -3,17 +3,37 @@ Ollama Client for FastAPI Backend
 Provides local LLM capabilities via Ollama
 """
 
-import asyncio
 import json
 import logging
 import os
+import threading
 from typing import AsyncGenerator, Optional, List
 
 import httpx
 
+from apps.api.http_transport import get_shared_transport
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional; stdlib json also accepts bytes
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
 
+def _extract_error(body: bytes, status_code: int) -> str:
+    """Pull the message out of an Ollama error body (failure path only)"""
+    if not body:
+        return str(status_code)
+    try:
+        error = _json_loads(body).get("error")
+    except (ValueError, AttributeError):
+        return body.decode("utf-8", errors="replace")
+    return str(error) if error else body.decode("utf-8", errors="replace")
+
+
 class OllamaClient:
     """Client for Ollama API (local LLMs)"""
 
@@ -23,30 +43,46 @@ class OllamaClient:
     ):
         self.base_url = base_url.rstrip("/")
         self._client: Optional[httpx.AsyncClient] = None
+        self._transport: Optional[httpx.AsyncHTTPTransport] = None
         self.timeout = 120.0  # Longer timeout for local models
 
+    def set_shared_transport(self, transport: httpx.AsyncHTTPTransport) -> None:
+        """Route requests through a process-wide transport (owned by the caller)"""
+        self._transport = transport
+        self._client = None
+
     async def _get_client(self) -> httpx.AsyncClient:
         """Get or create HTTP client"""
         if self._client is None:
             headers = {
                 "Content-Type": "application/json",
             }
-            self._client = httpx.AsyncClient(
-                timeout=self.timeout,
-                headers=headers,
-                limits=httpx.Limits(
-                    max_keepalive_connections=5,
-                    max_connections=10,
-                    keepalive_expiry=60.0,  # Longer for local connections
-                ),
-                # Don't use HTTP/2 for local connections
-            )
+            if self._transport is not None:
+                # Plain-http localhost negotiates HTTP/1.1 on the shared pool
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    headers=headers,
+                    transport=self._transport,
+                )
+            else:
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeout,
+                    headers=headers,
+                    limits=httpx.Limits(
+                        max_keepalive_connections=5,
+                        max_connections=10,
+                        keepalive_expiry=60.0,  # Longer for local connections
+                    ),
+                    # Don't use HTTP/2 for local connections
+                )
         return self._client
 
     async def close(self):
         """Close HTTP client"""
         if self._client:
-            await self._client.aclose()
+            # A shared transport is closed by its owner, not by each client
+            if self._transport is None:
+                await self._client.aclose()
             self._client = None
 
     async def check_available(self) -> bool:
@@ -79,35 +115,15 @@ class OllamaClient:
         try:
             client = await self._get_client()
             
-            # Ollama expects messages in a specific format
-            # Combine system messages into the prompt
-            system_parts = []
-            user_parts = []
-            
-            for msg in messages:
-                role = msg.get("role", "user")
-                content = msg.get("content", "")
-                
-                if role == "system":
-                    system_parts.append(content)
-                elif role == "user":
-                    user_parts.append(content)
-                elif role == "assistant":
-                    # Ollama doesn't support multi-turn easily, just append to prompt
-                    pass
-            
-            # Build prompt: system + user messages
-            prompt_parts = []
-            if system_parts:
-                prompt_parts.append("System:\n" + "\n".join(system_parts))
-            if user_parts:
-                prompt_parts.append("User:\n" + "\n".join(user_parts))
-            
-            prompt = "\n\n".join(prompt_parts)
+            # /api/chat accepts the role-tagged history natively (system, user, assistant)
+            ollama_messages = [
+                {"role": msg.get("role", "user"), "content": msg.get("content", "")}
+                for msg in messages
+            ]
             
             request_body = {
                 "model": model,
-                "prompt": prompt,
+                "messages": ollama_messages,
                 "stream": True,
                 "options": {
                     "temperature": temperature,
@@ -117,19 +133,12 @@ class OllamaClient:
             
             async with client.stream(
                 "POST",
-                f"{self.base_url}/api/generate",
+                f"{self.base_url}/api/chat",
                 json=request_body,
                 timeout=self.timeout,
             ) as response:
                 if not response.is_success:
-                    error_text = await response.aread()
-                    error_msg = error_text.decode() if error_text else str(response.status_code)
-                    try:
-                        error_json = json.loads(error_msg)
-                        if "error" in error_json:
-                            error_msg = error_json["error"]
-                    except:
-                        pass
+                    error_msg = _extract_error(await response.aread(), response.status_code)
                     yield {"text": "", "done": True, "error": f"Ollama error: {error_msg}"}
                     return
 
@@ -137,23 +146,32 @@ class OllamaClient:
                 prompt_tokens = 0
                 completion_tokens = 0
                 
-                async for chunk in response.aiter_text():
-                    if not chunk.strip():
+                chunks: List[bytes] = []
+                
+                async for chunk in response.aiter_bytes():
+                    chunks.append(chunk)
+                    if b"\n" not in chunk:
                         continue
-                    
-                    lines = chunk.strip().split("\n")
-                    for line in lines:
-                        line = line.strip()
+
+                    # Scan complete lines once; only the trailing remainder is retained
+                    buf = b"".join(chunks)
+                    start = 0
+                    while True:
+                        idx = buf.find(b"\n", start)
+                        if idx == -1:
+                            break
+                        line = buf[start:idx].strip()
+                        start = idx + 1
                         if not line:
                             continue
 
                         try:
-                            data = json.loads(line)
+                            data = _json_loads(line)
                             
                             # Extract text delta
-                            if "response" in data:
-                                text = data["response"]
-                                yield {"text": text, "done": False, "error": None}
+                            message = data.get("message")
+                            if message and message.get("content"):
+                                yield {"text": message["content"], "done": False, "error": None}
                             
                             # Extract usage info
                             if "prompt_eval_count" in data:
@@ -172,6 +190,7 @@ class OllamaClient:
                                 return
                         except json.JSONDecodeError:
                             continue
+                    chunks = [buf[start:]]
 
                 # If we exit without done, construct usage from last known values
                 if usage_info is None:
@@ -191,6 +210,7 @@ class OllamaClient:
 
 
 # Global singleton instance
+_ollama_client_lock = threading.Lock()
 _ollama_client: Optional[OllamaClient] = None
 
 
@@ -200,6 +220,10 @@ def get_ollama_client(
     """Get or create Ollama client singleton"""
     global _ollama_client
     if _ollama_client is None:
-        url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
-        _ollama_client = OllamaClient(base_url=url)
+        # Double-checked so concurrent first calls (e.g. threadpool endpoints) build one client
+        with _ollama_client_lock:
+            if _ollama_client is None:
+                url = base_url or os.getenv("OLLAMA_BASE_URL", "http://localhost:11434")
+                _ollama_client = OllamaClient(base_url=url)
+                _ollama_client.set_shared_transport(get_shared_transport())
     return _ollama_client
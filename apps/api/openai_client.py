@@ -3,7 +3,6 @@ OpenAI Client for FastAPI Backend
 Provides ChatGPT and OpenAI API capabilities
 """
 
-import asyncio
 import json
 import logging
 import os
@@ -6,20 +6,34 @@ import asyncio
 import hashlib
 import json
 import logging
-from typing import Optional, Dict
+import time
+import uuid
+from collections import deque
+from typing import AsyncGenerator, Optional, Dict
 
-from fastapi import APIRouter, HTTPException, Depends, status
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi import APIRouter, HTTPException, Depends, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
 
-from apps.api.security import get_current_user
-from apps.api.models import User
+from apps.api.security import CurrentUser, get_current_user
 from apps.api.ollama_client import get_ollama_client
 from apps.api.cache import cache_get, cache_set
+from apps.api.services.lru import LRUStore
+
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _response_class = ORJSONResponse
+except ImportError:  # orjson is optional; encode stdlib output to match its bytes API
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+    _response_class = JSONResponse
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=_response_class)
 
 # Circuit breaker for Ollama (simple implementation)
 class CircuitBreaker:
@@ -37,7 +51,6 @@ class CircuitBreaker:
 
     def record_failure(self):
         """Record failed call"""
-        import time
         self.failure_count += 1
         self.last_failure_time = time.time()
         if self.failure_count >= self.failure_threshold:
@@ -46,7 +59,6 @@ class CircuitBreaker:
 
     def can_attempt(self) -> bool:
         """Check if we can attempt a call"""
-        import time
         if self.state == "closed":
             return True
         if self.state == "open":
@@ -61,23 +73,73 @@ class CircuitBreaker:
 ollama_circuit_breaker = CircuitBreaker(failure_threshold=5, timeout=60)
 
 class PlanRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     goal: str
     mode: Optional[str] = None
 
 class RunRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     plan_id: Optional[str] = None
     goal: Optional[str] = None
 
-# Mock data store
-plans_db: dict[str, dict] = {}
-runs_db: dict[str, dict] = {}
-run_streams: dict[str, asyncio.Queue] = {}
+def _json_body(model: type[BaseModel]):
+    """Validate the raw body with pydantic-core's JSON parser (no json.loads + dict pass)"""
+    async def parse(request: Request) -> BaseModel:
+        try:
+            return model.model_validate_json(await request.body())
+        except ValidationError as exc:
+            # Same error locations FastAPI reports for a declared body parameter
+            raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in exc.errors()])
+    return parse
+
+def _json_body_openapi(model: type[BaseModel]) -> dict:
+    """Keep the request body documented when it is parsed by _json_body"""
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": model.model_json_schema()}},
+        }
+    }
+
+# Mock data store (bounded so long-running processes don't grow without limit)
+plans_db: LRUStore[str, dict] = LRUStore(maxsize=10_000)
+runs_db: LRUStore[str, dict] = LRUStore(maxsize=10_000)
+run_streams: LRUStore[str, "RunStream"] = LRUStore(maxsize=1_000)
 run_tasks: Dict[str, asyncio.Task] = {}
 
-@router.post("/plan")
-async def create_plan(request: PlanRequest, current_user: User = Depends(get_current_user)):
+class RunStream:
+    """
+    Fan-out channel between one agent run (producer) and its SSE readers.
+
+    The producer never waits on a reader: each reader drains its own queue,
+    and a bounded replay buffer lets late or reconnecting readers catch up.
+    """
+
+    def __init__(self, replay_size: int = 512):
+        self.history: deque = deque(maxlen=replay_size)
+        self.subscribers: set[asyncio.Queue] = set()
+
+    async def put(self, event: dict) -> None:
+        self.history.append(event)
+        for subscriber in self.subscribers:
+            subscriber.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+@router.post("/plan", openapi_extra=_json_body_openapi(PlanRequest))
+async def create_plan(request: PlanRequest = Depends(_json_body(PlanRequest)), current_user: CurrentUser = Depends(get_current_user)):
     """Generate a plan from user goal"""
-    plan_id = f"plan_{len(plans_db)}"
+    plan_id = f"plan_{uuid.uuid4().hex}"
     
     # TODO: Call agent planner
     plan = {
@@ -95,12 +157,10 @@ async def create_plan(request: PlanRequest, current_user: User = Depends(get_cur
     plans_db[plan_id] = plan
     return plan
 
-@router.post("/run")
-async def start_run(request: RunRequest, current_user: User = Depends(get_current_user)):
+@router.post("/run", openapi_extra=_json_body_openapi(RunRequest))
+async def start_run(request: RunRequest = Depends(_json_body(RunRequest)), current_user: CurrentUser = Depends(get_current_user)):
     """Start agent run with caching and error resilience"""
-    import time
-    
-    run_id = f"run_{len(runs_db)}"
+    run_id = f"run_{uuid.uuid4().hex}"
     goal = request.goal or ""
     
     # Check cache for identical queries (cache key based on goal hash)
@@ -125,14 +185,16 @@ async def start_run(request: RunRequest, current_user: User = Depends(get_curren
     
     runs_db[run_id] = run
 
-    stream_queue: asyncio.Queue = asyncio.Queue()
-    run_streams[run_id] = stream_queue
-    task = asyncio.create_task(_simulate_run(run_id, stream_queue, goal, cache_key))
+    stream = RunStream()
+    run_streams[run_id] = stream
+    task = asyncio.create_task(_simulate_run(run_id, stream, goal, cache_key))
     run_tasks[run_id] = task
+    # The run owns its lifetime; readers disconnecting no longer cancel it
+    task.add_done_callback(lambda _: run_tasks.pop(run_id, None))
     return {"id": run_id, "plan_id": request.plan_id, "status": run["status"]}
 
 @router.get("/runs/{run_id}")
-async def stream_run(run_id: str, current_user: User = Depends(get_current_user)):
+async def stream_run(run_id: str, current_user: CurrentUser = Depends(get_current_user)):
     """Stream agent run updates via SSE"""
     if run_id not in runs_db:
         raise HTTPException(status_code=404, detail="Run not found")
@@ -140,32 +202,47 @@ async def stream_run(run_id: str, current_user: User = Depends(get_current_user)
     if run.get("owner_id") != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Run access denied")
 
-    queue = run_streams.get(run_id)
-    if queue is None:
-        queue = asyncio.Queue()
-        run_streams[run_id] = queue
+    stream = run_streams.get(run_id)
+    if stream is None:
+        # run_streams holds fewer runs than runs_db, so older streams get evicted.
+        # A new empty stream would never see a "done" event; don't create one
+        if run.get("status") == "running":
+            raise HTTPException(status_code=status.HTTP_410_GONE, detail="Run stream no longer available")
+        return StreamingResponse(_replay_final_state(run), media_type="text/event-stream")
+    queue = stream.subscribe()
 
-    async def generate():
+    async def generate() -> AsyncGenerator[bytes, None]:
         try:
             while True:
                 event = await queue.get()
-                yield f"data: {json.dumps(event)}\n\n"
+                yield b"data: " + _json_dumps(event) + b"\n\n"
                 if event.get("type") == "done":
                     break
         finally:
-            run_streams.pop(run_id, None)
-            task = run_tasks.pop(run_id, None)
-            if task:
-                task.cancel()
+            stream.unsubscribe(queue)
     
     return StreamingResponse(generate(), media_type="text/event-stream")
 
-async def _simulate_run(run_id: str, queue: asyncio.Queue, goal: str, cache_key: Optional[str] = None) -> None:
+async def _replay_final_state(run: dict) -> AsyncGenerator[bytes, None]:
+    """Single "done" event rebuilt from runs_db for a finished run whose stream was evicted"""
+    event = {
+        "type": "done",
+        "run_id": run["id"],
+        "status": run.get("status"),
+        "message": "Run already finished; its event stream is no longer available",
+        "total_tokens": run.get("total_tokens", 0),
+        "timestamp": run.get("completed_at"),
+    }
+    yield b"data: " + _json_dumps(event) + b"\n\n"
+
+async def _simulate_run(run_id: str, queue: RunStream, goal: str, cache_key: Optional[str] = None) -> None:
     """
     Real agent run with Ollama streaming (with fallback to simulation).
     Includes caching, retry logic, and circuit breaker for resilience.
     """
     total_tokens = 0
+    # Keep our own reference; the run may be evicted from runs_db while in flight
+    run = runs_db[run_id]
     loop = asyncio.get_running_loop()
     timestamp_ms = lambda: int(loop.time() * 1000)
     
@@ -199,8 +276,8 @@ async def _simulate_run(run_id: str, queue: asyncio.Queue, goal: str, cache_key:
                     "message": "Response served from cache",
                     "timestamp": timestamp_ms(),
                 })
-                runs_db[run_id]["status"] = "completed"
-                runs_db[run_id]["total_tokens"] = cached_data.get("tokens", 0)
+                run["status"] = "completed"
+                run["total_tokens"] = cached_data.get("tokens", 0)
                 return
             except Exception as e:
                 logger.warning(f"Failed to parse cached response: {e}")
@@ -393,7 +470,6 @@ async def _simulate_run(run_id: str, queue: asyncio.Queue, goal: str, cache_key:
 
     # Consent check (if we have enough context)
     if accumulated_text and len(accumulated_text) > 100:
-        await asyncio.sleep(0.3)
         await queue.put({
             "type": "consent",
             "run_id": run_id,
@@ -414,7 +490,6 @@ async def _simulate_run(run_id: str, queue: asyncio.Queue, goal: str, cache_key:
         logger.info(f"Cached response for run {run_id}")
     
     # Finalize
-    await asyncio.sleep(0.2)
     final_message = "Redix completed the task. You can review the full transcript or export the findings."
     await queue.put({
         "type": "done",
@@ -422,7 +497,7 @@ async def _simulate_run(run_id: str, queue: asyncio.Queue, goal: str, cache_key:
         "message": final_message,
         "timestamp": timestamp_ms(),
     })
-    runs_db[run_id]["status"] = "completed"
-    runs_db[run_id]["completed_at"] = timestamp_ms()
-    runs_db[run_id]["total_tokens"] = total_tokens
+    run["status"] = "completed"
+    run["completed_at"] = timestamp_ms()
+    run["total_tokens"] = total_tokens
 
@@ -4,25 +4,65 @@ AI Metrics Endpoint - Query cost, usage, and performance metrics
 
 from __future__ import annotations
 
+import calendar
 import logging
+import os
+import threading
+import time
 from datetime import datetime, timedelta
 from typing import Optional, List, Dict, Any
 
 from fastapi import APIRouter, HTTPException, Query, Depends
-from sqlalchemy import func, and_
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import func, and_, case
 from sqlalchemy.orm import Session
 
 from apps.api.database import get_db
 from apps.api.models import AITaskMetric
 from apps.api.services.cache import get_cache_stats, clear_cache
+from apps.api.services.lru import LRUStore
+from apps.api.services.metrics_rollup import (
+    ROLLUP_BUCKET_SECONDS,
+    rollup_available,
+    query_rollup_timeline,
+)
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+
+    _response_class = ORJSONResponse
+except ImportError:  # orjson is optional
+    _response_class = JSONResponse
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter()
+router = APIRouter(default_response_class=_response_class)
+
+# Dashboards poll these read-only endpoints on a timer; serve repeats from memory
+_METRICS_CACHE_TTL_SECONDS = float(os.getenv("AI_METRICS_CACHE_TTL", "15"))
+_metrics_cache: LRUStore[tuple, tuple[float, Dict[str, Any]]] = LRUStore(maxsize=256)
+# Handlers run in the threadpool, so guard the LRU bookkeeping
+_metrics_cache_lock = threading.Lock()
+
+
+def _cached_metrics(key: tuple) -> Optional[Dict[str, Any]]:
+    with _metrics_cache_lock:
+        entry = _metrics_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < _METRICS_CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+
+def _remember_metrics(key: tuple, result: Dict[str, Any]) -> Dict[str, Any]:
+    with _metrics_cache_lock:
+        _metrics_cache[key] = (time.monotonic(), result)
+    return result
 
 
+# The DB-backed handlers below are sync on purpose: the Session is blocking, so
+# FastAPI runs them in its threadpool instead of on the event loop
 @router.get("/ai/metrics/summary")
-async def get_metrics_summary(
+def get_metrics_summary(
     hours: int = Query(24, ge=1, le=168, description="Time window in hours"),
     kind: Optional[str] = Query(None, description="Filter by task kind"),
     mode: Optional[str] = Query(None, description="Filter by mode"),
@@ -33,22 +73,42 @@ async def get_metrics_summary(
     Get summary metrics for AI tasks.
     Returns aggregated stats: total requests, success rate, costs, latency, etc.
     """
+    cache_key = ("summary", hours, kind, mode, client_id)
+    cached = _cached_metrics(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        query = db.query(AITaskMetric).filter(AITaskMetric.timestamp >= cutoff)
-        
+        filters = [AITaskMetric.timestamp >= cutoff]
         if kind:
-            query = query.filter(AITaskMetric.kind == kind)
+            filters.append(AITaskMetric.kind == kind)
         if mode:
-            query = query.filter(AITaskMetric.mode == mode)
+            filters.append(AITaskMetric.mode == mode)
         if client_id:
-            query = query.filter(AITaskMetric.client_id == client_id)
+            filters.append(AITaskMetric.client_id == client_id)
         
-        metrics = query.all()
+        # One grouped scan at (kind, provider, model) granularity; totals, by_kind
+        # and by_model are all folded from these few rows in a single pass
+        rows = (
+            db.query(
+                AITaskMetric.kind,
+                AITaskMetric.provider,
+                AITaskMetric.model,
+                func.count(AITaskMetric.id),
+                func.sum(case((AITaskMetric.status == "success", 1), else_=0)),
+                func.coalesce(func.sum(AITaskMetric.estimated_cost_usd), 0.0),
+                func.coalesce(func.sum(AITaskMetric.total_tokens), 0),
+                func.sum(AITaskMetric.latency_ms),
+            )
+            .filter(*filters)
+            .group_by(AITaskMetric.kind, AITaskMetric.provider, AITaskMetric.model)
+            .all()
+        )
         
-        if not metrics:
-            return {
+        if not rows:
+            return _remember_metrics(cache_key, {
                 "period_hours": hours,
                 "total_requests": 0,
                 "success_count": 0,
@@ -59,75 +119,71 @@ async def get_metrics_summary(
                 "total_tokens": 0,
                 "by_kind": {},
                 "by_model": {},
-            }
-        
-        success_count = sum(1 for m in metrics if m.status == "success")
-        error_count = len(metrics) - success_count
-        total_cost = sum(m.estimated_cost_usd or 0.0 for m in metrics)
-        total_tokens = sum(m.total_tokens or 0 for m in metrics)
-        avg_latency = sum(m.latency_ms for m in metrics) / len(metrics) if metrics else 0
+            })
         
-        # Group by kind
+        total_requests = success_count = total_tokens = total_latency = 0
+        total_cost = 0.0
         by_kind: Dict[str, Dict[str, Any]] = {}
-        for m in metrics:
-            if m.kind not in by_kind:
-                by_kind[m.kind] = {
-                    "count": 0,
-                    "success": 0,
-                    "errors": 0,
-                    "cost_usd": 0.0,
-                    "tokens": 0,
-                }
-            by_kind[m.kind]["count"] += 1
-            if m.status == "success":
-                by_kind[m.kind]["success"] += 1
-            else:
-                by_kind[m.kind]["errors"] += 1
-            by_kind[m.kind]["cost_usd"] += m.estimated_cost_usd or 0.0
-            by_kind[m.kind]["tokens"] += m.total_tokens or 0
-        
-        # Group by model
         by_model: Dict[str, Dict[str, Any]] = {}
-        for m in metrics:
-            key = f"{m.provider}:{m.model}"
-            if key not in by_model:
-                by_model[key] = {
-                    "count": 0,
-                    "cost_usd": 0.0,
-                    "tokens": 0,
-                    "avg_latency_ms": 0,
-                }
-            by_model[key]["count"] += 1
-            by_model[key]["cost_usd"] += m.estimated_cost_usd or 0.0
-            by_model[key]["tokens"] += m.total_tokens or 0
-        
-        # Calculate average latency per model
-        for key in by_model:
-            model_metrics = [m for m in metrics if f"{m.provider}:{m.model}" == key]
-            if model_metrics:
-                by_model[key]["avg_latency_ms"] = int(
-                    sum(m.latency_ms for m in model_metrics) / len(model_metrics)
-                )
+        model_latency: Dict[str, int] = {}
+        for row_kind, provider, model, count, success, cost, tokens, latency in rows:
+            success = int(success or 0)
+            cost = float(cost)
+            tokens = int(tokens)
+            latency = int(latency or 0)
+            
+            total_requests += count
+            success_count += success
+            total_cost += cost
+            total_tokens += tokens
+            total_latency += latency
+            
+            kind_stats = by_kind.setdefault(
+                row_kind,
+                {"count": 0, "success": 0, "errors": 0, "cost_usd": 0.0, "tokens": 0},
+            )
+            kind_stats["count"] += count
+            kind_stats["success"] += success
+            kind_stats["errors"] += count - success
+            kind_stats["cost_usd"] += cost
+            kind_stats["tokens"] += tokens
+            
+            key = f"{provider}:{model}"
+            model_stats = by_model.setdefault(
+                key,
+                {"count": 0, "cost_usd": 0.0, "tokens": 0, "avg_latency_ms": 0},
+            )
+            model_stats["count"] += count
+            model_stats["cost_usd"] += cost
+            model_stats["tokens"] += tokens
+            model_latency[key] = model_latency.get(key, 0) + latency
+        
+        # Divide once per model after the pass
+        for key, model_stats in by_model.items():
+            model_stats["avg_latency_ms"] = int(model_latency[key] / model_stats["count"])
         
-        return {
+        error_count = total_requests - success_count
+        avg_latency = total_latency / total_requests
+        
+        return _remember_metrics(cache_key, {
             "period_hours": hours,
-            "total_requests": len(metrics),
+            "total_requests": total_requests,
             "success_count": success_count,
             "error_count": error_count,
-            "success_rate": success_count / len(metrics) if metrics else 0.0,
-            "total_cost_usd": round(total_cost, 6),
+            "success_rate": success_count / total_requests,
+            "total_cost_usd": round(float(total_cost), 6),
             "avg_latency_ms": int(avg_latency),
             "total_tokens": total_tokens,
             "by_kind": by_kind,
             "by_model": by_model,
-        }
+        })
     except Exception as exc:
         logger.error("Failed to get metrics summary: %s", exc)
         raise HTTPException(status_code=500, detail="Failed to retrieve metrics")
 
 
 @router.get("/ai/metrics/timeline")
-async def get_metrics_timeline(
+def get_metrics_timeline(
     hours: int = Query(24, ge=1, le=168),
     interval_minutes: int = Query(60, ge=5, le=1440, description="Bucket size in minutes"),
     kind: Optional[str] = Query(None),
@@ -137,54 +193,99 @@ async def get_metrics_timeline(
     Get time-series metrics for plotting.
     Returns data points grouped by time intervals.
     """
+    cache_key = ("timeline", hours, interval_minutes, kind)
+    cached = _cached_metrics(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         cutoff = datetime.utcnow() - timedelta(hours=hours)
+        interval_seconds = interval_minutes * 60
+        
+        # Pre-aggregated path (PostgreSQL): O(#buckets) instead of O(#rows)
+        if rollup_available() and interval_seconds % ROLLUP_BUCKET_SECONDS == 0:
+            rows = query_rollup_timeline(db, calendar.timegm(cutoff.utctimetuple()), interval_seconds, kind)
+            return _remember_metrics(cache_key, {
+                "interval_minutes": interval_minutes,
+                "period_hours": hours,
+                "data": [
+                    {
+                        "timestamp": datetime.utcfromtimestamp(row.bucket).isoformat(),
+                        "count": int(row.request_count),
+                        "success_count": int(row.success_count),
+                        "error_count": int(row.error_count),
+                        "cost_usd": round(float(row.cost_sum), 6),
+                        "avg_latency_ms": int(row.latency_sum / row.request_count),
+                        "total_tokens": int(row.tokens_sum),
+                    }
+                    for row in rows
+                ],
+            })
         
-        query = db.query(AITaskMetric).filter(AITaskMetric.timestamp >= cutoff)
+        # Project only the needed columns and stream them as tuples (no ORM hydration);
+        # the timestamp comes back as a UTC epoch so bucketing is plain integer math
+        query = db.query(
+            func.extract("epoch", AITaskMetric.timestamp).label("ts_epoch"),
+            AITaskMetric.status,
+            AITaskMetric.estimated_cost_usd,
+            AITaskMetric.latency_ms,
+            AITaskMetric.total_tokens,
+        ).filter(AITaskMetric.timestamp >= cutoff)
         if kind:
             query = query.filter(AITaskMetric.kind == kind)
         
-        metrics = query.order_by(AITaskMetric.timestamp).all()
+        rows = (
+            query.order_by(AITaskMetric.timestamp)
+            .execution_options(stream_results=True)
+            .yield_per(1000)
+        )
         
-        if not metrics:
-            return {"intervals": [], "data": []}
+        # Group into time buckets, accumulating in a single pass:
+        # [count, success_count, error_count, cost_usd, latency_sum, total_tokens]
+        buckets: Dict[int, List[Any]] = {}
+        for ts_epoch, row_status, cost, latency_ms, tokens in rows:
+            bucket_time = int(ts_epoch) // interval_seconds * interval_seconds
+            bucket = buckets.get(bucket_time)
+            if bucket is None:
+                bucket = buckets[bucket_time] = [0, 0, 0, 0.0, 0, 0]
+            bucket[0] += 1
+            if row_status == "success":
+                bucket[1] += 1
+            elif row_status == "error":
+                bucket[2] += 1
+            bucket[3] += cost or 0.0
+            bucket[4] += latency_ms
+            bucket[5] += tokens or 0
         
-        # Group into time buckets
-        interval_seconds = interval_minutes * 60
-        buckets: Dict[int, List[AITaskMetric]] = {}
-        
-        for m in metrics:
-            bucket_time = int(m.timestamp.timestamp() // interval_seconds) * interval_seconds
-            if bucket_time not in buckets:
-                buckets[bucket_time] = []
-            buckets[bucket_time].append(m)
+        if not buckets:
+            return _remember_metrics(cache_key, {"intervals": [], "data": []})
         
         # Build timeline data
         timeline = []
         for bucket_time in sorted(buckets.keys()):
-            bucket_metrics = buckets[bucket_time]
+            count, success_count, error_count, cost_usd, latency_sum, total_tokens = buckets[bucket_time]
             timeline.append({
-                "timestamp": datetime.fromtimestamp(bucket_time).isoformat(),
-                "count": len(bucket_metrics),
-                "success_count": sum(1 for m in bucket_metrics if m.status == "success"),
-                "error_count": sum(1 for m in bucket_metrics if m.status == "error"),
-                "cost_usd": round(sum(m.estimated_cost_usd or 0.0 for m in bucket_metrics), 6),
-                "avg_latency_ms": int(sum(m.latency_ms for m in bucket_metrics) / len(bucket_metrics)),
-                "total_tokens": sum(m.total_tokens or 0 for m in bucket_metrics),
+                "timestamp": datetime.utcfromtimestamp(bucket_time).isoformat(),
+                "count": count,
+                "success_count": success_count,
+                "error_count": error_count,
+                "cost_usd": round(cost_usd, 6),
+                "avg_latency_ms": int(latency_sum / count),
+                "total_tokens": total_tokens,
             })
         
-        return {
+        return _remember_metrics(cache_key, {
             "interval_minutes": interval_minutes,
             "period_hours": hours,
             "data": timeline,
-        }
+        })
     except Exception as exc:
         logger.error("Failed to get metrics timeline: %s", exc)
         raise HTTPException(status_code=500, detail="Failed to retrieve timeline")
 
 
 @router.get("/ai/metrics/top-errors")
-async def get_top_errors(
+def get_top_errors(
     hours: int = Query(24, ge=1, le=168),
     limit: int = Query(10, ge=1, le=50),
     db: Session = Depends(get_db),
@@ -192,11 +293,22 @@ async def get_top_errors(
     """
     Get most common errors in the time window.
     """
+    cache_key = ("top-errors", hours, limit)
+    cached = _cached_metrics(cache_key)
+    if cached is not None:
+        return cached
+    
     try:
         cutoff = datetime.utcnow() - timedelta(hours=hours)
         
-        error_metrics = (
-            db.query(AITaskMetric)
+        # Truncate, group and rank in the database; only `limit` rows come back
+        message = func.coalesce(
+            func.nullif(func.substr(AITaskMetric.error, 1, 200), ""),
+            "Unknown error",
+        ).label("message")
+        occurrences = func.count(AITaskMetric.id).label("occurrences")
+        top_errors = (
+            db.query(message, occurrences)
             .filter(
                 and_(
                     AITaskMetric.timestamp >= cutoff,
@@ -204,22 +316,16 @@ async def get_top_errors(
                     AITaskMetric.error.isnot(None),
                 )
             )
+            .group_by(message)
+            .order_by(occurrences.desc(), message)
+            .limit(limit)
             .all()
         )
         
-        # Group by error message
-        error_counts: Dict[str, int] = {}
-        for m in error_metrics:
-            error_msg = (m.error or "Unknown error")[:200]  # Truncate long errors
-            error_counts[error_msg] = error_counts.get(error_msg, 0) + 1
-        
-        # Sort and limit
-        top_errors = sorted(error_counts.items(), key=lambda x: x[1], reverse=True)[:limit]
-        
-        return {
+        return _remember_metrics(cache_key, {
             "period_hours": hours,
             "errors": [{"message": msg, "count": count} for msg, count in top_errors],
-        }
+        })
     except Exception as exc:
         logger.error("Failed to get top errors: %s", exc)
         raise HTTPException(status_code=500, detail="Failed to retrieve errors")
@@ -231,7 +337,7 @@ async def get_cache_stats_endpoint():
     Get cache statistics.
     """
     try:
-        stats = get_cache_stats()
+        stats = await get_cache_stats()
         return stats
     except Exception as exc:
         logger.error("Failed to get cache stats: %s", exc)
@@ -244,7 +350,7 @@ async def clear_cache_endpoint():
     Clear all cache entries.
     """
     try:
-        count = clear_cache()
+        count = await clear_cache()
         return {"cleared": count, "message": f"Cleared {count} cache entries"}
     except Exception as exc:
         logger.error("Failed to clear cache: %s", exc)
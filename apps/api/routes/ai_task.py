@@ -7,6 +7,7 @@ Streaming + multi-provider routing will be layered on in the next iteration.
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import os
 import time
@@ -19,7 +20,7 @@ from pydantic import BaseModel, Field
 from apps.api.openai_client import get_openai_client
 from apps.api.anthropic_client import get_anthropic_client
 from apps.api.ollama_client import get_ollama_client
-from apps.api.services.search_aggregator import aggregate_search
+from apps.api.services.search_aggregator import aggregate_search_coalesced
 from apps.api.services.telemetry import record_ai_task_metric
 from apps.api.services.ai_policy import (
     select_model_for_task,
@@ -47,10 +48,35 @@ from apps.api.services.cache import (
     get_cache_ttl,
 )
 
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional; fall back to stdlib json
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Mode-specific system prompts that override the per-kind policy prompt
+MODE_SYSTEM_PROMPTS: Dict[str, str] = {
+    "trade": (
+        "You are a professional trading analyst. Provide structured trading signals with: "
+        "action (buy/sell/hold), entry price, stop loss, take profit, confidence (0-100), "
+        "risk/reward ratio, and rationale. Be precise with numbers and risk-aware. "
+        "Always include position sizing recommendations based on portfolio risk limits."
+    ),
+    "games": (
+        "You are a gaming recommendation assistant. Help users discover games that match "
+        "their preferences based on their favorite games, recent plays, and categories. "
+        "Recommend games with similar gameplay mechanics, genres, or styles. "
+        "Provide clear game IDs or titles in your response for easy matching. "
+        "Consider diversity - suggest a mix of categories when possible."
+    ),
+}
+
 
 class AITaskRequest(BaseModel):
     kind: str = Field(..., description="Task type e.g. search, agent, chat, summary.")
@@ -76,10 +102,51 @@ def build_stream_payload(
     *,
     event_type: str,
     data: Dict[str, Any],
-) -> str:
-    import json
+) -> bytes:
+    return b"event: " + event_type.encode() + b"\ndata: " + _json_dumps(data) + b"\n\n"
+
+
+def build_data_frame(text: str) -> bytes:
+    """SSE message carrying text; one data: line per text line, which clients join with \\n"""
+    lines = text.replace("\r\n", "\n").replace("\r", "\n").encode().split(b"\n")
+    return b"".join([b"data: " + line + b"\n" for line in lines]) + b"\n"
+
+
+async def _maybe_search(prompt: str, kind: str) -> Optional[List[dict]]:
+    """Aggregate web results for search tasks; None for other kinds or on failure"""
+    if kind.lower() != 'search':
+        return None
+    try:
+        search_payload = await aggregate_search_coalesced(
+            query=prompt,
+            sources=['duckduckgo', 'bing'],
+            max_results=8,
+            bing_api_key=os.getenv('BING_API_KEY'),
+            include_summary=False,
+        )
+        return search_payload if isinstance(search_payload, list) else search_payload.get('results', [])
+    except Exception as exc:
+        logger.warning("Search aggregation failed for ai_task: %s", exc)
+        return None
+
 
-    return f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+async def _cached_sse_generator(cached_response: Dict[str, Any], model_spec):
+    """Replay a cached ai_task response as SSE"""
+    # Cached text is already complete - send it as a single frame
+    if cached_response.get("text"):
+        yield build_data_frame(cached_response["text"])
+    
+    payload = {
+        "latency_ms": 0,  # Cached, no latency
+        "provider": cached_response.get("provider", model_spec.provider),
+        "model": cached_response.get("model", model_spec.model),
+        "text": cached_response.get("text", ""),
+        "usage": cached_response.get("usage"),
+        "citations": cached_response.get("citations", []),
+        "estimated_cost_usd": 0.0,  # Cached, no cost
+        "cached": True,
+    }
+    yield build_stream_payload(event_type="done", data=payload)
 
 
 @router.post("/ai/task", response_model=AITaskResponse)
@@ -118,33 +185,41 @@ async def run_ai_task(request_body: AITaskRequest, request: Request):
     
     # Resolve cost tier and select model using policy engine
     cost_tier = resolve_cost_tier(request_body.metadata)
-    available_providers = await get_available_providers()
+    cacheable = should_cache(request_body.kind, prompt)
+    # Provider discovery and search aggregation are independent I/O. A cacheable
+    # request only searches after a cache miss: the coalesced search is shielded,
+    # so cancelling it on a hit would not stop the provider fan-out
+    search_task = None if cacheable else asyncio.create_task(_maybe_search(prompt, request_body.kind))
+    try:
+        available_providers = await get_available_providers()
+    except BaseException:
+        if search_task is not None:
+            search_task.cancel()
+        raise
     # Fallback to OpenAI if no providers available
     if not available_providers:
         available_providers = ["openai"]
     model_spec = select_model_for_task(request_body.kind, cost_tier, available_providers)
     
-    # Get system prompt, with mode-specific overrides
-    base_system_prompt = get_system_prompt(request_body.kind)
-    if request_body.mode and request_body.mode.lower() == 'trade':
-        # Trading-specific system prompt
-        system_prompt = (
-            "You are a professional trading analyst. Provide structured trading signals with: "
-            "action (buy/sell/hold), entry price, stop loss, take profit, confidence (0-100), "
-            "risk/reward ratio, and rationale. Be precise with numbers and risk-aware. "
-            "Always include position sizing recommendations based on portfolio risk limits."
-        )
-    elif request_body.mode and request_body.mode.lower() == 'games':
-        # Games-specific system prompt
-        system_prompt = (
-            "You are a gaming recommendation assistant. Help users discover games that match "
-            "their preferences based on their favorite games, recent plays, and categories. "
-            "Recommend games with similar gameplay mechanics, genres, or styles. "
-            "Provide clear game IDs or titles in your response for easy matching. "
-            "Consider diversity - suggest a mix of categories when possible."
-        )
+    # Check cache before building context/messages so a hit skips all of it
+    if cacheable:
+        context_hash = hash_context(request_body.context)
+        cache_key_str = cache_key(prompt, request_body.kind, model_spec.model, context_hash)
+        cached_response = await get_cached_response(cache_key_str, get_cache_ttl(request_body.kind))
+        if cached_response:
+            logger.info(f"Cache hit for kind={request_body.kind} model={model_spec.model}")
+            return StreamingResponse(
+                _cached_sse_generator(cached_response, model_spec),
+                media_type="text/event-stream",
+            )
+        search_results = await _maybe_search(prompt, request_body.kind)
     else:
-        system_prompt = base_system_prompt
+        cache_key_str = None
+        search_results = await search_task
+    
+    # Get system prompt, with mode-specific overrides
+    mode = request_body.mode.lower() if request_body.mode else ""
+    system_prompt = MODE_SYSTEM_PROMPTS.get(mode) or get_system_prompt(request_body.kind)
     
     # Build enhanced context from various sources (memories, agent runs, tabs, etc.)
     enhanced_context = ""
@@ -176,93 +251,51 @@ async def run_ai_task(request_body: AITaskRequest, request: Request):
     
     messages.append({"role": "user", "content": prompt})
 
-    def normalize_citations(raw_citations: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def normalize_citations(raw_citations: List[Dict[str, Any]]) -> tuple[List[Dict[str, Any]], str]:
+        """Normalize citations and build the prompt context block in the same pass"""
         normalized: List[Dict[str, Any]] = []
-        for idx, citation in enumerate(raw_citations):
+        parts: List[str] = []
+        for idx, citation in enumerate(raw_citations, start=1):
+            url = citation.get("url")
+            title = citation.get("title") or url or f"Source {idx}"
+            snippet = citation.get("snippet")
             normalized.append(
                 {
-                    "index": idx + 1,
-                    "title": citation.get("title") or citation.get("url") or f"Source {idx + 1}",
-                    "url": citation.get("url"),
-                    "snippet": citation.get("snippet"),
+                    "index": idx,
+                    "title": title,
+                    "url": url,
+                    "snippet": snippet,
                     "source": citation.get("source") or citation.get("domain"),
                 }
             )
-        return normalized
+            parts.append(f"[{idx}] {title}\n{url}\n{snippet or ''}")
+        return normalized, "\n\n".join(parts)
 
     citations: List[Dict[str, Any]] = []
-    if request_body.kind.lower() == 'search':
-        try:
-            search_payload = await aggregate_search(
-                query=prompt,
-                sources=['duckduckgo', 'bing'],
-                max_results=8,
-                bing_api_key=os.getenv('BING_API_KEY'),
-                include_summary=False,
+    if search_results:
+        citations, context_block = normalize_citations(search_results[:8])
+        if citations:
+            messages.append(
+                {
+                    "role": "system",
+                    "content": f"Search sources:\n{context_block}",
+                }
             )
-            results: List[dict] = search_payload if isinstance(search_payload, list) else search_payload.get('results', [])
-            citations = normalize_citations(results[:8])
-            if citations:
-                context_block = "\n\n".join(
-                    f"[{idx + 1}] {cite.get('title')}\n{cite.get('url')}\n{cite.get('snippet') or ''}"
-                    for idx, cite in enumerate(citations)
-                )
-                messages.append(
-                    {
-                        "role": "system",
-                        "content": f"Search sources:\n{context_block}",
-                    }
-                )
-        except Exception as exc:
-            logger.warning("Search aggregation failed for ai_task: %s", exc)
 
     async def sse_generator():
-        nonlocal start, model_spec, client_id, cost_tier, limiter, prompt, request_body
+        nonlocal start, model_spec, client_id, cost_tier, limiter, prompt, request_body, cache_key_str
         current_spec = model_spec
         attempt = 0
         max_attempts = 3  # Try primary model, then fallback with retries
         base_delay = 0.5  # Initial delay in seconds
         
-        # Check cache first (only for cacheable requests)
-        if should_cache(request_body.kind, prompt):
-            context_hash = hash_context(request_body.context)
-            cache_key_str = cache_key(prompt, request_body.kind, current_spec.model, context_hash)
-            cached_response = get_cached_response(cache_key_str, get_cache_ttl(request_body.kind))
-            
-            if cached_response:
-                logger.info(f"Cache hit for kind={request_body.kind} model={current_spec.model}")
-                # Stream cached response (simulate token-by-token streaming)
-                if cached_response.get("text"):
-                    text = cached_response["text"]
-                    # Stream in chunks to simulate real streaming (better UX)
-                    chunk_size = 10  # Characters per chunk
-                    for i in range(0, len(text), chunk_size):
-                        chunk = text[i:i + chunk_size]
-                        yield f"data: {chunk}\n\n"
-                        # Small delay for more realistic streaming (optional)
-                        # await asyncio.sleep(0.01)
-                
-                # Return cached result
-                payload = {
-                    "latency_ms": 0,  # Cached, no latency
-                    "provider": cached_response.get("provider", current_spec.provider),
-                    "model": cached_response.get("model", current_spec.model),
-                    "text": cached_response.get("text", ""),
-                    "usage": cached_response.get("usage"),
-                    "citations": cached_response.get("citations", citations),
-                    "estimated_cost_usd": 0.0,  # Cached, no cost
-                    "cached": True,
-                }
-                yield build_stream_payload(event_type="done", data=payload)
-                return
-        
         while attempt < max_attempts:
             try:
                 model = current_spec.model
                 max_tokens = current_spec.max_tokens
                 temperature = current_spec.temperature
                 
-                full_text = []
+                text_buf = bytearray()
                 usage_info: Dict[str, Any] | None = None
                 
                 # Route to the correct provider based on model spec
@@ -306,9 +339,10 @@ async def run_ai_task(request_body: AITaskRequest, request: Request):
                         raise RuntimeError(chunk["error"])
                     if chunk.get("usage"):
                         usage_info = chunk["usage"]
-                    if chunk.get("text"):
-                        full_text.append(chunk["text"])
-                        yield f"data: {chunk['text']}\n\n"
+                    text = chunk.get("text")
+                    if text:
+                        text_buf += text.encode()
+                        yield build_data_frame(text)
                 
                 elapsed = int((time.perf_counter() - start) * 1000)
                 estimated_cost = None
@@ -326,7 +360,7 @@ async def run_ai_task(request_body: AITaskRequest, request: Request):
                     "latency_ms": elapsed,
                     "provider": current_spec.provider,
                     "model": model,
-                    "text": "".join(full_text),
+                    "text": text_buf.decode(),
                     "usage": usage_info,
                     "citations": citations,
                     "estimated_cost_usd": estimated_cost,
@@ -360,11 +394,11 @@ async def run_ai_task(request_body: AITaskRequest, request: Request):
                 )
                 
                 # Cache successful response
-                if should_cache(request_body.kind, prompt):
-                    context_hash = hash_context(request_body.context)
-                    cache_key_str = cache_key(prompt, request_body.kind, model, context_hash)
+                if cacheable:
+                    if model != model_spec.model:
+                        cache_key_str = cache_key(prompt, request_body.kind, model, context_hash)
                     cache_ttl = get_cache_ttl(request_body.kind)
-                    set_cached_response(
+                    await set_cached_response(
                         cache_key_str,
                         {
                             "text": payload["text"],
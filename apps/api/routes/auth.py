@@ -5,8 +5,10 @@ Auth Routes - Signup, Login, OIDC, Token Refresh
 from fastapi import APIRouter, HTTPException, Depends, status
 from pydantic import BaseModel, EmailStr
 from typing import Optional
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 
+from apps.api.bcrypt_pool import run_in_bcrypt_pool
 from apps.api.database import get_db
 from apps.api.models import User
 from apps.api.security import (
@@ -14,6 +16,7 @@ from apps.api.security import (
     create_access_token,
     create_refresh_token,
     get_current_user,
+    CurrentUser,
     get_password_hash,
     decode_token,
     ACCESS_TOKEN_EXPIRE_MINUTES,
@@ -44,17 +47,23 @@ class RefreshRequest(BaseModel):
 @router.post("/signup", status_code=status.HTTP_201_CREATED)
 async def signup(request: SignupRequest, db: Session = Depends(get_db)):
     """User registration"""
-    existing = db.query(User).filter(User.email == request.email.lower()).first()
-    if existing:
+    email = request.email.lower()
+    # Index-only EXISTS; avoids paying for a bcrypt hash on an obvious duplicate
+    if db.query(db.query(User.id).filter(User.email == email).exists()).scalar():
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
 
     user = User(
-        email=request.email.lower(),
+        email=email,
         handle=request.handle or request.email.split("@")[0],
-        password_hash=get_password_hash(request.password),
+        password_hash=await run_in_bcrypt_pool(get_password_hash, request.password),
     )
     db.add(user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent signup; the unique index on users.email is authoritative
+        db.rollback()
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already registered")
     db.refresh(user)
 
     return {"message": "User created", "email": user.email, "id": user.id}
@@ -63,7 +72,7 @@ async def signup(request: SignupRequest, db: Session = Depends(get_db)):
 @router.post("/login", response_model=TokenResponse)
 async def login(request: LoginRequest, db: Session = Depends(get_db)):
     """Email/password login"""
-    user = authenticate_user(db, request.email, request.password)
+    user = await authenticate_user(db, request.email, request.password)
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
 
@@ -91,8 +100,8 @@ async def login_otp(phone: str):
 @router.post("/token/refresh")
 async def refresh_token(request: RefreshRequest, db: Session = Depends(get_db)):
     """Refresh access token"""
-    token_payload = decode_token(request.refresh_token)
-    user = db.query(User).filter(User.id == token_payload.sub).first()
+    user_id = decode_token(request.refresh_token)["sub"]
+    user = db.query(User).filter(User.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
 
@@ -105,7 +114,7 @@ async def refresh_token(request: RefreshRequest, db: Session = Depends(get_db)):
 
 
 @router.get("/me")
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     """Return the authenticated user profile."""
     return {
         "id": current_user.id,
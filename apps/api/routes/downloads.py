@@ -5,6 +5,9 @@ Downloads Routes
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import Optional
+from itertools import count
+
+from apps.api.services.lru import LRUStore
 
 router = APIRouter()
 
@@ -17,12 +20,13 @@ class DownloadResponse(BaseModel):
     url: str
     status: str
 
-downloads_db: dict[str, dict] = {}
+downloads_db: LRUStore[str, dict] = LRUStore(maxsize=10_000)
+_download_ids = count()  # Monotonic, so ids stay unique after eviction
 
 @router.post("", response_model=DownloadResponse)
 async def queue_download(request: DownloadRequest):
     """Queue a download"""
-    download_id = f"dl_{len(downloads_db)}"
+    download_id = f"dl_{next(_download_ids)}"
     
     download = {
         "id": download_id,
@@ -3,16 +3,22 @@
 from __future__ import annotations
 
 import asyncio
+import logging
 import time
 from typing import Dict, Tuple
 
 from fastapi import APIRouter, Response, status
 from sqlalchemy import text
 
+from apps.api.bcrypt_pool import run_in_bcrypt_pool
 from apps.api.database import SessionLocal
+from apps.api.security import warm_up as warm_up_security
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["health"])
 _start_time = time.monotonic()
+_warmed_up = False
 
 
 def _check_database() -> Tuple[bool, str | None]:
@@ -24,6 +30,18 @@ def _check_database() -> Tuple[bool, str | None]:
         return False, str(exc)
 
 
+async def warm_up() -> None:
+    """Prime bcrypt, JWT and the DB pool; /readyz stays 503 until this has run."""
+    global _warmed_up
+    try:
+        await run_in_bcrypt_pool(warm_up_security)
+        await asyncio.get_running_loop().run_in_executor(None, _check_database)
+    except Exception as exc:  # pragma: no cover - defensive
+        logger.warning("Startup warm-up failed: %s", exc)
+    finally:
+        _warmed_up = True
+
+
 @router.get("/healthz")
 async def liveness() -> Dict[str, float | str]:
     """Fast liveness probe used for container orchestration."""
@@ -41,7 +59,11 @@ async def readiness(response: Response) -> Dict[str, object]:
         "database": {
             "ok": db_ok,
             "error": db_error,
-        }
+        },
+        "warmup": {
+            "ok": _warmed_up,
+            "error": None if _warmed_up else "warming up",
+        },
     }
     all_ok = all(check["ok"] for check in checks.values())
     payload: Dict[str, object] = {
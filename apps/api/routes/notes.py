@@ -2,9 +2,14 @@
 Notes Routes
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import List, Optional
+from itertools import count
+import zlib
+
+from apps.api.http_cache import etag_matches, not_modified, set_cache_headers, weak_etag
+from apps.api.services.lru import LRUStore
 
 router = APIRouter()
 
@@ -18,12 +23,13 @@ class NoteResponse(BaseModel):
     sources: Optional[List[dict]]
     created_at: str
 
-notes_db: dict[str, dict] = {}
+notes_db: LRUStore[str, dict] = LRUStore(maxsize=10_000)
+_note_ids = count()  # Monotonic, so ids stay unique after eviction
 
 @router.post("", response_model=NoteResponse)
 async def create_note(request: NoteCreate):
     """Create a note"""
-    note_id = f"note_{len(notes_db)}"
+    note_id = f"note_{next(_note_ids)}"
     note = {
         "id": note_id,
         "content": request.content,
@@ -34,9 +40,15 @@ async def create_note(request: NoteCreate):
     return note
 
 @router.get("/{note_id}", response_model=NoteResponse)
-async def get_note(note_id: str):
+async def get_note(note_id: str, http_request: Request, response: Response):
     """Get note by ID"""
-    if note_id not in notes_db:
+    note = notes_db.get(note_id)
+    if note is None:
         raise HTTPException(status_code=404, detail="Note not found")
-    return notes_db[note_id]
+    # Notes are immutable once created; the content hash guards against id reuse after a restart
+    etag = weak_etag(note_id, zlib.crc32(note["content"].encode()))
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    return note
 
@@ -10,7 +10,16 @@ import json
 import os
 
 from apps.api.cache import cache_get, cache_set
-from apps.api.services.search_aggregator import aggregate_search
+from apps.api.services.search_aggregator import aggregate_search_coalesced
+
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+except ImportError:  # orjson is optional
+    _json_dumps = json.dumps
+    _json_loads = json.loads
 
 router = APIRouter()
 
@@ -47,9 +56,10 @@ async def search(request: SearchRequest):
     cache_key = f"search:{request.query}:{request.max_results}"
     cached = await cache_get(cache_key)
     if cached:
-        payload = json.loads(cached)
+        payload = _json_loads(cached)
         return SearchResponse(
-            results=[SearchResult(**item) for item in payload.get('results', [])],
+            # Cached items were written by model_dump() below, so skip validation
+            results=[SearchResult.model_construct(**item) for item in payload.get('results', [])],
             query=request.query,
             total_results=len(payload.get('results', [])),
             sources_used=payload.get('sources_used', []),
@@ -63,7 +73,7 @@ async def search(request: SearchRequest):
     
     # Perform aggregated search
     try:
-        search_response = await aggregate_search(
+        search_response = await aggregate_search_coalesced(
             query=request.query,
             sources=sources,
             max_results=request.max_results or 20,
@@ -105,7 +115,7 @@ async def search(request: SearchRequest):
             'sources_used': sources_used,
             'summary': summary,
         }
-        await cache_set(cache_key, cache_payload, ttl_seconds=300)
+        await cache_set(cache_key, _json_dumps(cache_payload), ttl_seconds=300)
         
         return SearchResponse(
             results=results,
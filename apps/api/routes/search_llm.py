@@ -5,19 +5,49 @@ Performs web search + LLM synthesis and returns answer with citations.
 
 from __future__ import annotations
 
+import json
 import logging
 import os
 import time
-from typing import List, Optional
+from typing import AsyncGenerator, List, Optional
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
-from apps.api.services.search_aggregator import aggregate_search
+from apps.api.services.search_aggregator import aggregate_search_coalesced
 from apps.api.openai_client import get_openai_client
 
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+except ImportError:  # orjson is optional; encode stdlib output to match its bytes API
+    def _json_dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
 logger = logging.getLogger(__name__)
 
+OPENAI_SEARCH_MODEL = os.getenv("OPENAI_SEARCH_MODEL", "gpt-4o-mini")
+BING_API_KEY = os.getenv("BING_API_KEY")
+
+# Shared by every request; the client only reads it
+SYSTEM_MSG = {
+    "role": "system",
+    "content": (
+        "Provide concise, factual answers with at most three short paragraphs. "
+        "Use markdown bullets when helpful. Always cite sources as [n]."
+    ),
+}
+
+# Caps the numbered context sent to the LLM; prompt tokens are the endpoint's main cost
+CONTEXT_CHAR_BUDGET = 3000
+
+_USER_PREAMBLE = (
+    "You are Regen's AI research copilot. Answer the query using ONLY the context below. "
+    "Cite sources inline using [n] that correspond to the numbered context items.\n\n"
+)
+
 router = APIRouter()
 
 
@@ -32,6 +62,7 @@ class SearchLLMRequest(BaseModel):
     query: str
     max_results: Optional[int] = 8
     temperature: Optional[float] = 0.2
+    stream: bool = False  # True: SSE events (citations, delta..., done) instead of one JSON body
 
 
 class SearchLLMResponse(BaseModel):
@@ -46,69 +77,118 @@ class SearchLLMResponse(BaseModel):
 def _fallback_answer(query: str, results: List[dict]) -> str:
     if not results:
         return f"I couldn't find any web results for “{query}”. Try refining the question."
-    top_titles = ", ".join(r.get("title", "")[:40] for r in results[:3])
-    domains = ", ".join({r.get("source", "") or r.get("domain", "") for r in results[:3]})
+    top = results[:3]
+    top_titles = ", ".join(r.get("title", "")[:40] for r in top)
+    domains = ", ".join({r.get("source", "") or r.get("domain", "") for r in top})
     return (
         f"Found {len(results)} sources for “{query}”. Leading coverage includes {top_titles} "
         f"from {domains or 'major sites'}. Click the sources for details."
     )
 
 
-async def _synthesize_answer(
+def _citation(item: dict) -> Citation:
+    # Aggregator output is already well-typed; skip re-validating it per item
+    url = item.get('url', '')
+    return Citation.model_construct(
+        title=item.get('title') or url,
+        url=url,
+        snippet=item.get('snippet'),
+        source=item.get('source') or item.get('domain'),
+    )
+
+
+def _sse_event(data: dict) -> bytes:
+    return b"data: " + _json_dumps(data) + b"\n\n"
+
+
+def _context_blocks(results: List[dict]):
+    """Yield numbered context entries until CONTEXT_CHAR_BUDGET is spent"""
+    used = 0
+    for idx, result in enumerate(results[:8], start=1):
+        block = (
+            f"[{idx}] {result.get('title', 'Untitled')} — {result.get('url', '')}\n"
+            f"{(result.get('snippet') or '')[:500]}"
+        )
+        used += len(block)
+        if used > CONTEXT_CHAR_BUDGET and idx > 1:
+            return
+        yield block
+
+
+async def _stream_answer(
     query: str,
     results: List[dict],
     temperature: float,
-) -> str:
+) -> AsyncGenerator[str, None]:
+    """Yield answer text as the LLM produces it; yields nothing if no LLM/context is available"""
     openai = get_openai_client()
     if not openai.api_key:
-        return _fallback_answer(query, results)
+        return
 
-    context_lines: List[str] = []
-    for idx, result in enumerate(results[:8], start=1):
-        snippet = (result.get("snippet") or "")[:500]
-        context_lines.append(
-            f"[{idx}] {result.get('title', 'Untitled')} — {result.get('url', '')}\n{snippet}"
-        )
+    context = "\n\n".join(_context_blocks(results))
+    if not context:
+        return
 
-    if not context_lines:
-        return _fallback_answer(query, results)
+    user_content = _USER_PREAMBLE + f"Query: {query}\n\nContext:\n" + context
+
+    async for chunk in openai.stream_chat(
+        messages=[SYSTEM_MSG, {"role": "user", "content": user_content}],
+        model=OPENAI_SEARCH_MODEL,
+        temperature=temperature,
+        max_tokens=700,
+    ):
+        if chunk.get("error"):
+            raise RuntimeError(chunk["error"])
+        if chunk.get("text"):
+            yield chunk["text"]
 
-    user_content = (
-        "You are Regen's AI research copilot. Answer the query using ONLY the context below. "
-        "Cite sources inline using [n] that correspond to the numbered context items.\n\n"
-        f"Query: {query}\n\nContext:\n" + "\n\n".join(context_lines)
-    )
 
-    answer_chunks: List[str] = []
+async def _synthesize_answer(
+    query: str,
+    results: List[dict],
+    temperature: float,
+) -> str:
     try:
-        async for chunk in openai.stream_chat(
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "Provide concise, factual answers with at most three short paragraphs. "
-                        "Use markdown bullets when helpful. Always cite sources as [n]."
-                    ),
-                },
-                {"role": "user", "content": user_content},
-            ],
-            model=os.getenv("OPENAI_SEARCH_MODEL", "gpt-4o-mini"),
-            temperature=temperature,
-            max_tokens=700,
-        ):
-            if chunk.get("error"):
-                raise RuntimeError(chunk["error"])
-            if chunk.get("text"):
-                answer_chunks.append(chunk["text"])
+        answer = "".join([text async for text in _stream_answer(query, results, temperature)]).strip()
     except Exception as exc:
         logger.warning("LLM synthesis failed: %s", exc)
         return _fallback_answer(query, results)
-
-    answer = "".join(answer_chunks).strip()
     return answer or _fallback_answer(query, results)
 
 
-@router.post("/search_llm", response_model=SearchLLMResponse)
+async def _stream_search_llm(
+    query: str,
+    results: List[dict],
+    citations: List[Citation],
+    temperature: float,
+    start: float,
+) -> AsyncGenerator[bytes, None]:
+    """SSE: citations first, then answer deltas as they arrive, then done"""
+    yield _sse_event({"type": "citations", "citations": [c.model_dump() for c in citations]})
+
+    streamed = False
+    try:
+        async for text in _stream_answer(query, results, temperature):
+            streamed = True
+            yield _sse_event({"type": "delta", "text": text})
+    except Exception as exc:
+        logger.warning("LLM synthesis failed: %s", exc)
+        if streamed:
+            # Tokens already went out, so a fallback answer can't replace them
+            yield _sse_event({"type": "error", "message": "Answer generation interrupted"})
+    if not streamed:
+        yield _sse_event({"type": "delta", "text": _fallback_answer(query, results)})
+
+    yield _sse_event({
+        "type": "done",
+        "timestamp": time.time(),
+        "latency_ms": int((time.perf_counter() - start) * 1000),
+    })
+
+
+# The body is assembled from trusted values, so it is returned as-is rather than
+# re-validated through response_model; SearchLLMResponse still documents it
+@router.post("/search_llm", response_model=None, responses={200: {"model": SearchLLMResponse}})
 async def search_llm(request: SearchLLMRequest):
     query = request.query.strip()
     if not query:
@@ -118,11 +198,11 @@ async def search_llm(request: SearchLLMRequest):
     start = time.perf_counter()
 
     try:
-        search_payload = await aggregate_search(
+        search_payload = await aggregate_search_coalesced(
             query=query,
             sources=['duckduckgo', 'bing'],
             max_results=min(max(request.max_results or 8, 3), 12),
-            bing_api_key=os.getenv('BING_API_KEY'),
+            bing_api_key=BING_API_KEY,
             include_summary=False,
         )
     except Exception as exc:
@@ -133,20 +213,18 @@ async def search_llm(request: SearchLLMRequest):
     if not results:
         raise HTTPException(status_code=404, detail="No search results found")
 
+    citations = [_citation(item) for item in results[:request.max_results or 8]]
+
+    if request.stream:
+        return StreamingResponse(
+            _stream_search_llm(query, results, citations, request.temperature or 0.2, start),
+            media_type="text/event-stream",
+        )
+
     answer = await _synthesize_answer(query, results, request.temperature or 0.2)
 
     elapsed = int((time.perf_counter() - start) * 1000)
 
-    citations = [
-        Citation(
-            title=item.get('title', '') or item.get('url', ''),
-            url=item.get('url', ''),
-            snippet=item.get('snippet'),
-            source=item.get('source') or item.get('domain'),
-        )
-        for item in results[:request.max_results or 8]
-    ]
-
     logger.info(
         "search_llm success query='%s' results=%d latency_ms=%d",
         query,
@@ -154,12 +232,13 @@ async def search_llm(request: SearchLLMRequest):
         elapsed,
     )
 
-    return SearchLLMResponse(
-        query=query,
-        answer=answer,
-        citations=citations,
-        raw_results=citations,
-        timestamp=time.time(),
-        latency_ms=elapsed,
-    )
+    citation_dicts = [citation.model_dump() for citation in citations]
+    return {
+        "query": query,
+        "answer": answer,
+        "citations": citation_dicts,
+        "raw_results": citation_dicts,
+        "timestamp": time.time(),
+        "latency_ms": elapsed,
+    }
 
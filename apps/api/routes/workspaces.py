@@ -2,21 +2,32 @@
 Workspace Routes - CRUD operations for workspaces and tabs
 """
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends, status
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, Depends, Query, Request, Response, status
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional, List
 from datetime import datetime
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 
 from apps.api.database import get_db
-from apps.api.models import Workspace, Tab, User
-from apps.api.security import get_current_user
+from apps.api.http_cache import etag_matches, not_modified, set_cache_headers, weak_etag
+from apps.api.models import Workspace, Tab
+from apps.api.security import CurrentUser, get_current_user
+from apps.api.services.lru import LRUStore
+
+try:
+    import orjson  # noqa: F401  (ORJSONResponse needs it at render time)
+
+    _response_class = ORJSONResponse
+except ImportError:  # orjson is optional
+    _response_class = JSONResponse
 
 router = APIRouter()
 
 # Keep mock for backward compatibility during migration
-workspaces_db: dict[str, dict] = {}
-tabs_db: dict[str, List[dict]] = {}
+workspaces_db: LRUStore[str, dict] = LRUStore(maxsize=10_000)
+tabs_db: LRUStore[str, List[dict]] = LRUStore(maxsize=10_000)
 
 class WorkspaceCreate(BaseModel):
     name: str
@@ -24,15 +35,6 @@ class WorkspaceCreate(BaseModel):
     vpn_profile_id: Optional[str] = None
     settings_json: Optional[dict] = None
 
-class WorkspaceResponse(BaseModel):
-    id: str
-    user_id: str
-    name: str
-    mode: str
-    vpn_profile_id: Optional[str]
-    settings_json: Optional[dict]
-    created_at: str
-
 class TabCreate(BaseModel):
     url: str
     title: Optional[str] = None
@@ -45,31 +47,111 @@ class TabResponse(BaseModel):
     status: str
     created_at: str
 
-@router.get("", response_model=List[WorkspaceResponse])
+class WorkspaceResponse(BaseModel):
+    id: str
+    user_id: str
+    name: str
+    mode: str
+    vpn_profile_id: Optional[str]
+    settings_json: Optional[dict]
+    created_at: str
+    tabs: Optional[List[TabResponse]] = None  # Only present with ?include=tabs
+
+
+# Column projections for the list endpoints; rows are mapped straight to dicts
+_WORKSPACE_COLUMNS = (
+    Workspace.id,
+    Workspace.user_id,
+    Workspace.name,
+    Workspace.mode,
+    Workspace.vpn_profile_id,
+    Workspace.settings_json,
+    Workspace.created_at,
+    Workspace.updated_at,
+)
+_TAB_COLUMNS = (Tab.id, Tab.workspace_id, Tab.url, Tab.title, Tab.status, Tab.created_at)
+
+
+def _tab_dict(row) -> dict:
+    tab_id, workspace_id, url, title, tab_status, created_at = row
+    return {
+        "id": tab_id,
+        "workspace_id": workspace_id,
+        "url": url,
+        "title": title,
+        "status": tab_status,
+        "created_at": created_at.isoformat(),
+    }
+
+
+def _version(updated_at: Optional[datetime]) -> int:
+    """Microsecond version stamp for ETags (rows predating updated_at count as 0)"""
+    return int(updated_at.timestamp() * 1_000_000) if updated_at else 0
+
+
+def _list_etag(count: int, latest: Optional[datetime], include: Optional[str]) -> str:
+    return weak_etag("workspaces", count, _version(latest), include or "")
+
+
+def _tab_response(t: Tab) -> TabResponse:
+    return TabResponse(
+        id=t.id,
+        workspace_id=t.workspace_id,
+        url=t.url,
+        title=t.title,
+        status=t.status,
+        created_at=t.created_at.isoformat(),
+    )
+
+@router.get("", response_model=List[WorkspaceResponse], response_model_exclude_unset=True)
 async def list_workspaces(
+    http_request: Request,
+    include: Optional[str] = Query(None, description="Set to 'tabs' to embed each workspace's tabs"),
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """List all workspaces for a user"""
-    workspaces = db.query(Workspace).filter(Workspace.user_id == current_user.id).all()
-    return [
-        WorkspaceResponse(
-            id=w.id,
-            user_id=w.user_id,
-            name=w.name,
-            mode=w.mode,
-            vpn_profile_id=w.vpn_profile_id,
-            settings_json=w.settings_json or {},
-            created_at=w.created_at.isoformat(),
-        )
-        for w in workspaces
+    owned = Workspace.user_id == current_user.id
+    if http_request.headers.get("if-none-match"):
+        # Revalidation: a count/max aggregate is enough to answer 304 without loading rows
+        count, latest = db.execute(select(func.count(), func.max(Workspace.updated_at)).where(owned)).one()
+        etag = _list_etag(count, latest, include)
+        if etag_matches(http_request, etag):
+            return not_modified(etag)
+
+    # Core rows -> dicts, returned as a Response so FastAPI skips re-validating them
+    rows = db.execute(select(*_WORKSPACE_COLUMNS).where(owned)).all()
+    workspaces = [
+        {
+            "id": ws_id,
+            "user_id": user_id,
+            "name": name,
+            "mode": mode,
+            "vpn_profile_id": vpn_profile_id,
+            "settings_json": settings_json or {},
+            "created_at": created_at.isoformat(),
+        }
+        for ws_id, user_id, name, mode, vpn_profile_id, settings_json, created_at, _ in rows
     ]
+    etag = _list_etag(len(rows), max((row.updated_at for row in rows if row.updated_at), default=None), include)
+    
+    if include == "tabs" and workspaces:
+        # One IN query for all tabs instead of a /tabs request per workspace
+        tabs_by_workspace: dict[str, list] = {w["id"]: [] for w in workspaces}
+        for row in db.execute(select(*_TAB_COLUMNS).where(Tab.workspace_id.in_(tabs_by_workspace))):
+            tabs_by_workspace[row.workspace_id].append(_tab_dict(row))
+        for w in workspaces:
+            w["tabs"] = tabs_by_workspace[w["id"]]
+    
+    response = _response_class(workspaces)
+    set_cache_headers(response, etag)
+    return response
 
-@router.post("", response_model=WorkspaceResponse)
+@router.post("", response_model=WorkspaceResponse, response_model_exclude_unset=True)
 async def create_workspace(
     request: WorkspaceCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Create a new workspace"""
     workspace = Workspace(
@@ -93,11 +175,13 @@ async def create_workspace(
         created_at=workspace.created_at.isoformat(),
     )
 
-@router.get("/{workspace_id}", response_model=WorkspaceResponse)
+@router.get("/{workspace_id}", response_model=WorkspaceResponse, response_model_exclude_unset=True)
 async def get_workspace(
     workspace_id: str,
+    http_request: Request,
+    response: Response,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Get workspace by ID"""
     workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
@@ -106,6 +190,11 @@ async def get_workspace(
     if workspace.user_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Workspace access denied")
     
+    etag = weak_etag(workspace.id, _version(workspace.updated_at))
+    if etag_matches(http_request, etag):
+        return not_modified(etag)
+    set_cache_headers(response, etag)
+    
     return WorkspaceResponse(
         id=workspace.id,
         user_id=workspace.user_id,
@@ -121,13 +210,14 @@ async def create_tab(
     workspace_id: str,
     request: TabCreate,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """Create a new tab in workspace"""
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
+    # Ownership check only needs user_id; skip hydrating the workspace
+    owner_id = db.query(Workspace.user_id).filter(Workspace.id == workspace_id).scalar()
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Workspace not found")
-    if workspace.user_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Workspace access denied")
     
     tab = Tab(
@@ -137,43 +227,28 @@ async def create_tab(
         status="active",
     )
     db.add(tab)
+    # Embedded tabs are part of the workspace representation, so bump its ETag version
+    db.execute(update(Workspace).where(Workspace.id == workspace_id).values(updated_at=datetime.utcnow()))
     db.commit()
     db.refresh(tab)
     
-    return TabResponse(
-        id=tab.id,
-        workspace_id=tab.workspace_id,
-        url=tab.url,
-        title=tab.title,
-        status=tab.status,
-        created_at=tab.created_at.isoformat(),
-    )
+    return _tab_response(tab)
 
 @router.get("/{workspace_id}/tabs", response_model=List[TabResponse])
 async def list_tabs(
     workspace_id: str,
     db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user),
+    current_user: CurrentUser = Depends(get_current_user),
 ):
     """List all tabs in workspace"""
-    workspace = db.query(Workspace).filter(Workspace.id == workspace_id).first()
-    if not workspace:
+    owner_id = db.execute(select(Workspace.user_id).where(Workspace.id == workspace_id)).scalar()
+    if owner_id is None:
         raise HTTPException(status_code=404, detail="Workspace not found")
-    if workspace.user_id != current_user.id:
+    if owner_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Workspace access denied")
     
-    tabs = db.query(Tab).filter(Tab.workspace_id == workspace_id).all()
-    return [
-        TabResponse(
-            id=t.id,
-            workspace_id=t.workspace_id,
-            url=t.url,
-            title=t.title,
-            status=t.status,
-            created_at=t.created_at.isoformat(),
-        )
-        for t in tabs
-    ]
+    rows = db.execute(select(*_TAB_COLUMNS).where(Tab.workspace_id == workspace_id))
+    return _response_class([_tab_dict(row) for row in rows])
 
 @router.websocket("/{workspace_id}/events")
 async def workspace_events(websocket: WebSocket, workspace_id: str):
@@ -4,88 +4,160 @@ Security utilities: password hashing, JWT issuance/validation, and auth dependen
 
 from __future__ import annotations
 
+import hashlib
 import os
+import threading
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Optional
+from typing import NamedTuple, Optional
 
+import bcrypt
+import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from jose import JWTError, jwt
-from passlib.context import CryptContext
-from pydantic import BaseModel, ConfigDict
 from sqlalchemy.orm import Session
 
+from apps.api.bcrypt_pool import run_in_bcrypt_pool
 from apps.api.database import get_db
 from apps.api.models import User
+from apps.api.services.lru import LRUStore
 
 JWT_SECRET = os.getenv("JWT_SECRET", "change-me-in-prod")
 JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "60"))
 REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+# Encoded once; PyJWT would otherwise convert the str secret on every encode/decode
+_JWT_KEY = JWT_SECRET.encode()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = 12
+BCRYPT_MAX_PASSWORD_BYTES = 72  # bcrypt ignores anything past this; truncate like passlib did
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
+# Verified tokens keyed by a digest of the raw token; entries are valid until the token's exp.
+# A bearer token is reused for its whole lifetime, so this skips the HMAC check and payload parse.
+_token_cache: LRUStore[bytes, dict] = LRUStore(maxsize=10_000)
+_token_cache_lock = threading.Lock()
 
-class TokenPayload(BaseModel):
-    sub: str
-    exp: int
-    email: Optional[str] = None
-    model_config = ConfigDict(extra="allow")
+# Short-lived identity cache so authenticated requests don't re-SELECT the user every time.
+# No endpoint updates user rows yet; the TTL bounds staleness once one does
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "5"))
+_user_cache: LRUStore[str, tuple[float, "CurrentUser"]] = LRUStore(maxsize=10_000)
+_user_cache_lock = threading.Lock()
+
+
+class CurrentUser(NamedTuple):
+    """Read-only projection of the authenticated user's columns"""
+
+    id: str
+    email: str
+    handle: Optional[str]
+    plan: Optional[str]
+    created_at: Optional[datetime]
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    # Hashes written by passlib are standard $2b$ strings, so checkpw verifies them as-is
+    try:
+        return bcrypt.checkpw(
+            plain_password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+            hashed_password.encode(),
+        )
+    except ValueError:  # Malformed or non-bcrypt hash
+        return False
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    return bcrypt.hashpw(
+        password.encode()[:BCRYPT_MAX_PASSWORD_BYTES],
+        bcrypt.gensalt(rounds=BCRYPT_ROUNDS),
+    ).decode()
+
+
+def warm_up() -> None:
+    """Run one bcrypt hash/verify and JWT round trip so the first login doesn't pay first-call costs"""
+    verify_password("warmup", get_password_hash("warmup"))
+    token = jwt.encode({"sub": "warmup"}, _JWT_KEY, algorithm=JWT_ALGORITHM)
+    jwt.decode(token, _JWT_KEY, algorithms=[JWT_ALGORITHM])
 
 
 def create_access_token(subject: str, *, expires_delta: Optional[timedelta] = None, claims: Optional[dict] = None) -> str:
-    expire = datetime.now(timezone.utc) + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
-    to_encode = {"sub": subject, "exp": expire, "iat": datetime.now(timezone.utc)}
+    now = datetime.now(timezone.utc)
+    expire = now + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
+    # Epoch ints go into the claims as-is; no datetime conversion inside the JWT library
+    to_encode = {"sub": subject, "exp": int(expire.timestamp()), "iat": int(now.timestamp())}
     if claims:
         to_encode.update(claims)
-    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(to_encode, _JWT_KEY, algorithm=JWT_ALGORITHM)
 
 
 def create_refresh_token(subject: str, *, claims: Optional[dict] = None) -> str:
-    expire = datetime.now(timezone.utc) + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"sub": subject, "exp": expire, "iat": datetime.now(timezone.utc)}
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {"sub": subject, "exp": int(expire.timestamp()), "iat": int(now.timestamp())}
     if claims:
         to_encode.update(claims)
-    return jwt.encode(to_encode, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    return jwt.encode(to_encode, _JWT_KEY, algorithm=JWT_ALGORITHM)
+
 
+def decode_token(token: str) -> dict:
+    cache_key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    with _token_cache_lock:
+        cached = _token_cache.get(cache_key)
+        if cached is not None:
+            if cached["exp"] > time.time():
+                return cached
+            # Expired: drop it and let jwt.decode reject the token
+            del _token_cache[cache_key]
 
-def decode_token(token: str) -> TokenPayload:
     try:
-        payload = jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        return TokenPayload(**payload)
-    except JWTError as exc:
+        # PyJWT checks exp and claim presence; we issued the claims, so no model validation
+        payload = jwt.decode(
+            token,
+            _JWT_KEY,
+            algorithms=[JWT_ALGORITHM],
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError as exc:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},
         ) from exc
 
+    with _token_cache_lock:
+        _token_cache[cache_key] = payload
+    return payload
+
 
-def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
+async def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     user = db.query(User).filter(User.email == email.lower()).first()
-    if not user or not verify_password(password, user.password_hash):
+    if not user or not await run_in_bcrypt_pool(verify_password, password, user.password_hash):
         return None
     return user
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
-    token_data = decode_token(token)
-    user = db.query(User).filter(User.id == token_data.sub).first()
-    if not user:
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> CurrentUser:
+    user_id = decode_token(token)["sub"]
+    now = time.monotonic()
+    with _user_cache_lock:
+        entry = _user_cache.get(user_id)
+    if entry is not None and now - entry[0] < USER_CACHE_TTL_SECONDS:
+        return entry[1]
+
+    row = (
+        db.query(User.id, User.email, User.handle, User.plan, User.created_at)
+        .filter(User.id == user_id)
+        .first()
+    )
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    user = CurrentUser(*row)
+    with _user_cache_lock:
+        _user_cache[user_id] = (now, user)
     return user
 
 
@@ -8,15 +8,56 @@ import hashlib
 import json
 import logging
 import os
-from datetime import datetime, timedelta
+import time
+from abc import ABC, abstractmethod
 from typing import Optional, Dict, Any
 from functools import lru_cache
 
+from redis.exceptions import RedisError
+
+from apps.api.services.lru import LRUStore
+
 logger = logging.getLogger(__name__)
 
-# In-memory cache (simple implementation)
-# TODO: Replace with Redis or similar for production
-_response_cache: Dict[str, Dict[str, Any]] = {}
+# Cache keys only need collision resistance, not a cryptographic hash
+try:
+    import xxhash
+
+    _key_digest = xxhash.xxh3_128_hexdigest  # 32 hex chars
+    _context_hasher = xxhash.xxh3_64  # 16 hex chars
+except ImportError:  # xxhash is optional; blake2b is still much cheaper than sha256
+    def _key_digest(data: str) -> str:
+        return hashlib.blake2b(data.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _context_hasher():
+        return hashlib.blake2b(digest_size=8)
+
+try:
+    import orjson
+
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+
+    def _sorted_json(value: Any) -> bytes:
+        return orjson.dumps(value, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+except ImportError:  # orjson is optional
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+    def _sorted_json(value: Any) -> bytes:
+        return json.dumps(value, sort_keys=True).encode("utf-8")
+
+# Resolved once at import; these are consulted on every AI request
+AI_CACHE_ENABLED = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
+AI_CACHE_BACKEND = os.getenv("AI_CACHE_BACKEND", "memory").lower()  # memory | redis
+AI_CACHE_MAX_ENTRIES = int(os.getenv("AI_CACHE_MAX_ENTRIES", "1000"))
+AI_CACHE_TTL_SEARCH = int(os.getenv("AI_CACHE_TTL_SEARCH", "1800"))  # 30 minutes
+AI_CACHE_TTL_CHAT = int(os.getenv("AI_CACHE_TTL_CHAT", "7200"))  # 2 hours
+AI_CACHE_TTL_DEFAULT = int(os.getenv("AI_CACHE_TTL_DEFAULT", "3600"))  # 1 hour
+
+_NO_CACHE_KINDS = frozenset({"agent", "execute"})
+_CACHE_KINDS = frozenset({"search", "chat", "summary"})
+_CHAT_TTL_KINDS = frozenset({"summary", "chat"})
 
 
 def cache_key(prompt: str, kind: str, model: Optional[str] = None, context_hash: Optional[str] = None) -> str:
@@ -32,14 +73,19 @@ def cache_key(prompt: str, kind: str, model: Optional[str] = None, context_hash:
     Returns:
         Cache key string
     """
-    key_parts = [prompt.strip().lower(), kind.lower()]
+    base = f"{prompt.strip().lower()}|{kind.lower()}"
+    # Fast path (e.g. scraper URLs): no extra parts to join
+    if not model and not context_hash:
+        return _key_digest(base)
+    
+    key_parts = [base]
     if model:
         key_parts.append(model.lower())
     if context_hash:
         key_parts.append(context_hash)
     
     key_str = "|".join(key_parts)
-    return hashlib.sha256(key_str.encode("utf-8")).hexdigest()
+    return _key_digest(key_str)
 
 
 def hash_context(context: Optional[Dict[str, Any]]) -> str:
@@ -55,29 +101,196 @@ def hash_context(context: Optional[Dict[str, Any]]) -> str:
     if not context:
         return ""
     
-    # Normalize context (remove timestamps, IDs that change but don't affect result)
-    normalized = {}
+    # Stream fields into the hasher in sorted key order instead of building and
+    # JSON-encoding a normalized copy. Timestamps/IDs that change but don't
+    # affect the result are left out.
+    hasher = _context_hasher()
     if isinstance(context, dict):
-        for key, value in context.items():
-            if key in ["memories", "agent_runs"]:
+        for key in sorted(context):
+            value = context[key]
+            if key in ("memories", "agent_runs"):
                 # Only hash the number of items and first item's content
-                if isinstance(value, list) and value:
-                    normalized[key] = {
-                        "count": len(value),
-                        "first_value": str(value[0].get("value", "")[:100]) if isinstance(value[0], dict) else str(value[0])[:100],
-                    }
+                if not (isinstance(value, list) and value):
+                    continue
+                first = value[0]
+                first_value = str(first.get("value", "")[:100]) if isinstance(first, dict) else str(first)[:100]
+                part = f"{len(value)}\x1e{first_value}".encode("utf-8")
             elif key == "active_tab":
                 # Only hash URL, not title (which may change)
-                if isinstance(value, dict):
-                    normalized[key] = value.get("url", "")
+                if not isinstance(value, dict):
+                    continue
+                part = value.get("url", "").encode("utf-8")
+            elif isinstance(value, (dict, list, tuple)):
+                # Sorted JSON, so nested keys arriving in another order hash the same
+                part = b"json\x1e" + _sorted_json(value)
             else:
-                normalized[key] = value
+                # Type tag keeps e.g. 1 and "1" apart
+                part = f"{type(value).__name__}\x1e{value}".encode("utf-8")
+            hasher.update(key.encode("utf-8"))
+            hasher.update(b"\x1f")
+            hasher.update(part)
+            hasher.update(b"\x1d")
     
-    context_str = json.dumps(normalized, sort_keys=True)
-    return hashlib.sha256(context_str.encode("utf-8")).hexdigest()[:16]
+    return hasher.hexdigest()
+
+
+class ResponseCache(ABC):
+    """Storage backend for cached AI responses"""
 
+    def __init__(self):
+        # Per-process counters, updated by get_cached_response
+        self.hits = 0
+        self.misses = 0
 
-def get_cached_response(cache_key_str: str, max_age_seconds: int = 3600) -> Optional[Dict[str, Any]]:
+    @abstractmethod
+    async def get(self, key: str, max_age_seconds: int) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, response: Dict[str, Any], ttl_seconds: int) -> None:
+        ...
+
+    @abstractmethod
+    async def clear(self) -> int:
+        ...
+
+    @abstractmethod
+    async def stats(self) -> Dict[str, Any]:
+        ...
+
+
+class InMemoryResponseCache(ResponseCache):
+    """
+    Per-process LRU cache. Each uvicorn worker holds its own copy, so prefer
+    the Redis backend when running more than one worker.
+    """
+
+    def __init__(self, max_entries: int):
+        super().__init__()
+        self.evictions = 0
+        # LRUStore marks entries on read and evicts the least recently used in O(1)
+        self._entries: LRUStore[str, Dict[str, Any]] = LRUStore(maxsize=max_entries)
+
+    async def get(self, key: str, max_age_seconds: int) -> Optional[Dict[str, Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        
+        # Check if expired (cached_at is time.monotonic() seconds)
+        age = time.monotonic() - entry["cached_at"]
+        if age > max_age_seconds:
+            # Remove expired entry
+            del self._entries[key]
+            logger.debug(f"Cache entry expired: {key} (age: {age:.0f}s)")
+            return None
+        
+        logger.debug(f"Cache hit: {key} (age: {age:.0f}s)")
+        return entry["response"]
+
+    async def set(self, key: str, response: Dict[str, Any], ttl_seconds: int) -> None:
+        # Past max entries the least recently used entry is evicted
+        if key not in self._entries and len(self._entries) >= self._entries.maxsize:
+            self.evictions += 1
+        self._entries[key] = {
+            "response": response,
+            "cached_at": time.monotonic(),
+            "ttl_seconds": ttl_seconds,
+        }
+
+    async def clear(self) -> int:
+        count = len(self._entries)
+        self._entries.clear()
+        return count
+
+    async def stats(self) -> Dict[str, Any]:
+        # Read-only: expired entries are counted, not dropped (get() drops them).
+        # TTLs differ by kind, so every entry is checked; the store is capped at max_entries
+        now = time.monotonic()
+        expired_entries = sum(
+            1 for entry in self._entries.values() if now - entry["cached_at"] > entry["ttl_seconds"]
+        )
+        total_entries = len(self._entries)
+        return {
+            "backend": "memory",
+            "total_entries": total_entries,
+            "valid_entries": total_entries - expired_entries,
+            "expired_entries": expired_entries,
+            "max_entries": self._entries.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+class RedisResponseCache(ResponseCache):
+    """
+    Cache shared by all workers. Redis enforces the TTL (SET ... EX) and its
+    maxmemory-policy handles eviction; Redis errors are treated as misses.
+    """
+
+    KEY_PREFIX = "ai_response:"
+
+    def __init__(self, client):
+        super().__init__()
+        self._client = client
+
+    async def get(self, key: str, max_age_seconds: int) -> Optional[Dict[str, Any]]:
+        # max_age_seconds isn't re-checked: callers read with the TTL they wrote with
+        try:
+            raw = await self._client.get(self.KEY_PREFIX + key)
+        except RedisError as exc:
+            logger.debug(f"Redis cache get failed: {exc}")
+            return None
+        return _json_loads(raw) if raw is not None else None
+
+    async def set(self, key: str, response: Dict[str, Any], ttl_seconds: int) -> None:
+        try:
+            await self._client.set(self.KEY_PREFIX + key, _json_dumps(response), ex=ttl_seconds)
+        except RedisError as exc:
+            logger.debug(f"Redis cache set failed: {exc}")
+
+    async def _keys(self) -> list:
+        return [key async for key in self._client.scan_iter(match=self.KEY_PREFIX + "*", count=500)]
+
+    async def clear(self) -> int:
+        try:
+            keys = await self._keys()
+            if keys:
+                await self._client.delete(*keys)
+            return len(keys)
+        except RedisError as exc:
+            logger.warning(f"Redis cache clear failed: {exc}")
+            return 0
+
+    async def stats(self) -> Dict[str, Any]:
+        # Counting keys means a SCAN over the whole keyspace, and Redis drops
+        # expired keys itself without telling us, so no entry counts are kept
+        return {
+            "backend": "redis",
+            "total_entries": None,
+            "valid_entries": None,
+            "expired_entries": None,
+            "max_entries": None,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def _create_backend() -> ResponseCache:
+    """AI_CACHE_BACKEND=redis shares the cache through apps.api.cache's client"""
+    if AI_CACHE_BACKEND == "redis":
+        from apps.api.cache import cache_client
+
+        if cache_client is not None:
+            return RedisResponseCache(cache_client)
+        logger.warning("AI_CACHE_BACKEND=redis but Redis is unavailable; using in-memory cache")
+    return InMemoryResponseCache(AI_CACHE_MAX_ENTRIES)
+
+
+_backend: ResponseCache = _create_backend()
+
+
+async def get_cached_response(cache_key_str: str, max_age_seconds: int = 3600) -> Optional[Dict[str, Any]]:
     """
     Get a cached response if available and not expired.
     
@@ -88,28 +301,15 @@ def get_cached_response(cache_key_str: str, max_age_seconds: int = 3600) -> Opti
     Returns:
         Cached response dict or None
     """
-    if cache_key_str not in _response_cache:
-        return None
-    
-    entry = _response_cache[cache_key_str]
-    cached_at = entry.get("cached_at")
-    
-    if not cached_at:
-        return None
-    
-    # Check if expired
-    age = (datetime.utcnow() - cached_at).total_seconds()
-    if age > max_age_seconds:
-        # Remove expired entry
-        del _response_cache[cache_key_str]
-        logger.debug(f"Cache entry expired: {cache_key_str} (age: {age:.0f}s)")
-        return None
-    
-    logger.debug(f"Cache hit: {cache_key_str} (age: {age:.0f}s)")
-    return entry.get("response")
+    response = await _backend.get(cache_key_str, max_age_seconds)
+    if response is None:
+        _backend.misses += 1
+    else:
+        _backend.hits += 1
+    return response
 
 
-def set_cached_response(cache_key_str: str, response: Dict[str, Any], ttl_seconds: int = 3600) -> None:
+async def set_cached_response(cache_key_str: str, response: Dict[str, Any], ttl_seconds: int = 3600) -> None:
     """
     Cache a response.
     
@@ -118,23 +318,7 @@ def set_cached_response(cache_key_str: str, response: Dict[str, Any], ttl_second
         response: Response dict to cache
         ttl_seconds: Time to live in seconds
     """
-    _response_cache[cache_key_str] = {
-        "response": response,
-        "cached_at": datetime.utcnow(),
-        "ttl_seconds": ttl_seconds,
-    }
-    
-    # Limit cache size (simple LRU eviction)
-    max_entries = int(os.getenv("AI_CACHE_MAX_ENTRIES", "1000"))
-    if len(_response_cache) > max_entries:
-        # Remove oldest entries (simple FIFO)
-        oldest_key = min(
-            _response_cache.keys(),
-            key=lambda k: _response_cache[k].get("cached_at", datetime.utcnow()),
-        )
-        del _response_cache[oldest_key]
-        logger.debug(f"Evicted oldest cache entry: {oldest_key}")
-    
+    await _backend.set(cache_key_str, response, ttl_seconds)
     logger.debug(f"Cached response: {cache_key_str} (TTL: {ttl_seconds}s)")
 
 
@@ -153,17 +337,17 @@ def should_cache(kind: str, prompt: str) -> bool:
     if len(prompt.strip()) < 10:
         return False
     
+    kind = kind.lower()
     # Don't cache agent tasks (they're often stateful)
-    if kind.lower() in ["agent", "execute"]:
+    if kind in _NO_CACHE_KINDS:
         return False
     
     # Cache search and chat tasks
-    if kind.lower() in ["search", "chat", "summary"]:
+    if kind in _CACHE_KINDS:
         return True
     
     # Default: cache if enabled
-    cache_enabled = os.getenv("AI_CACHE_ENABLED", "true").lower() == "true"
-    return cache_enabled
+    return AI_CACHE_ENABLED
 
 
 def get_cache_ttl(kind: str) -> int:
@@ -176,53 +360,39 @@ def get_cache_ttl(kind: str) -> int:
     Returns:
         TTL in seconds
     """
+    kind = kind.lower()
     # Short TTL for search (results may change)
-    if kind.lower() == "search":
-        return int(os.getenv("AI_CACHE_TTL_SEARCH", "1800"))  # 30 minutes
+    if kind == "search":
+        return AI_CACHE_TTL_SEARCH
     
     # Longer TTL for summaries and chat
-    if kind.lower() in ["summary", "chat"]:
-        return int(os.getenv("AI_CACHE_TTL_CHAT", "7200"))  # 2 hours
+    if kind in _CHAT_TTL_KINDS:
+        return AI_CACHE_TTL_CHAT
     
     # Default TTL
-    return int(os.getenv("AI_CACHE_TTL_DEFAULT", "3600"))  # 1 hour
+    return AI_CACHE_TTL_DEFAULT
 
 
-def clear_cache(pattern: Optional[str] = None) -> int:
+async def clear_cache(pattern: Optional[str] = None) -> int:
     """
     Clear cache entries.
     
     Args:
-        pattern: Optional pattern to match keys (not implemented in simple cache)
+        pattern: Optional pattern to match keys (not implemented)
     
     Returns:
         Number of entries cleared
     """
-    count = len(_response_cache)
-    _response_cache.clear()
+    count = await _backend.clear()
     logger.info(f"Cleared {count} cache entries")
     return count
 
 
-def get_cache_stats() -> Dict[str, Any]:
+async def get_cache_stats() -> Dict[str, Any]:
     """
     Get cache statistics.
     
     Returns:
         Dictionary with cache stats
     """
-    now = datetime.utcnow()
-    total_entries = len(_response_cache)
-    expired_entries = sum(
-        1
-        for entry in _response_cache.values()
-        if (now - entry.get("cached_at", now)).total_seconds() > entry.get("ttl_seconds", 0)
-    )
-    
-    return {
-        "total_entries": total_entries,
-        "valid_entries": total_entries - expired_entries,
-        "expired_entries": expired_entries,
-        "max_entries": int(os.getenv("AI_CACHE_MAX_ENTRIES", "1000")),
-    }
-
+    return await _backend.stats()
@@ -11,6 +11,122 @@ from datetime import datetime, timedelta
 logger = logging.getLogger(__name__)
 
 
+_SECTION_SEPARATOR = "\n\n---\n\n"
+
+
+def _truncate(value: Any, limit: int) -> str:
+    """Clip to limit chars; clipped strings get an ellipsis, other types are stringified and clipped"""
+    if type(value) is str:  # Values come from JSON, so no str subclasses to worry about
+        return value if len(value) <= limit else value[:limit] + "..."
+    return str(value)[:limit]
+
+
+def _write_memory_context(
+    out: List[str],
+    memories: List[Dict[str, Any]],
+    max_memories: int,
+    max_chars_per_memory: int,
+) -> bool:
+    """Append the memory block's pieces to out; returns False (out untouched) if empty"""
+    start = len(out)
+    append = out.append
+    append("Relevant memories:\n")
+    separator = ""
+    for mem in memories[:max_memories]:
+        value = _truncate(mem.get("value", ""), max_chars_per_memory)
+        metadata = mem.get("metadata", {})
+        url = metadata.get("url", "")
+        title = metadata.get("title") or url or "Memory"
+        
+        append(separator)
+        separator = "\n\n"
+        if url:
+            append(f"- {title} ({url})\n  {value}")
+        else:
+            append(f"- {title}\n  {value}")
+
+    if not separator:
+        del out[start:]
+        return False
+    return True
+
+
+def _write_recent_agent_runs_context(out: List[str], runs: List[Dict[str, Any]], max_runs: int) -> bool:
+    """Append the agent runs block's pieces to out; returns False (out untouched) if empty"""
+    start = len(out)
+    append = out.append
+    append("Recent interactions:\n")
+    separator = ""
+    for run in runs[:max_runs]:
+        prompt = run.get("prompt", "")[:150]  # Truncate
+        response = run.get("response", "")
+        success = run.get("success", False)
+        
+        if response:
+            status = "✓" if success else "✗"
+            append(separator)
+            separator = "\n"
+            append(f"{status} Q: {prompt}\n  A: {_truncate(response, 150)}")
+
+    if not separator:
+        del out[start:]
+        return False
+    return True
+
+
+def _write_tab_context(out: List[str], active_tab: Dict[str, Any]) -> bool:
+    """Append the active tab block's pieces to out; returns False if there is nothing to show"""
+    url = active_tab.get("url", "")
+    title = active_tab.get("title", "")
+    
+    if not url and not title:
+        return False
+
+    out.append("Current page:\n")
+    if title:
+        out.append(f"Page: {title}")
+    if url:
+        out.append(f"\nURL: {url}" if title else f"URL: {url}")
+    return True
+
+
+def _write_document_context(
+    out: List[str],
+    documents: List[Dict[str, Any]],
+    max_documents: int,
+    max_chars_per_document: int,
+) -> bool:
+    """Append the documents block's pieces to out; returns False (out untouched) if empty"""
+    start = len(out)
+    append = out.append
+    append("Uploaded documents:\n")
+    separator = ""
+    for doc in documents[:max_documents]:
+        name = doc.get("name", "Untitled")
+        text = _truncate(doc.get("text", ""), max_chars_per_document)
+        doc_type = doc.get("type", "unknown")
+        
+        append(separator)
+        separator = _SECTION_SEPARATOR
+        append(f"Document: {name} ({doc_type})\n{text}")
+
+    if not separator:
+        del out[start:]
+        return False
+    return True
+
+
+def _write_custom_context(out: List[str], custom: Any) -> bool:
+    """Append caller-supplied context (str as-is, dict stringified); other types are ignored"""
+    if isinstance(custom, str):
+        out.append(custom)
+    elif isinstance(custom, dict):
+        out.append(str(custom))
+    else:
+        return False
+    return True
+
+
 def build_memory_context(
     memories: Optional[List[Dict[str, Any]]] = None,
     max_memories: int = 5,
@@ -20,31 +136,10 @@ def build_memory_context(
     Build a context block from memory entries.
     Returns None if no memories provided or empty.
     """
-    if not memories or len(memories) == 0:
-        return None
-
-    context_lines: List[str] = []
-    for mem in memories[:max_memories]:
-        value = mem.get("value", "")
-        metadata = mem.get("metadata", {})
-        title = metadata.get("title") or metadata.get("url", "") or "Memory"
-        
-        # Truncate if needed
-        if isinstance(value, str) and len(value) > max_chars_per_memory:
-            value = value[:max_chars_per_memory] + "..."
-        elif not isinstance(value, str):
-            value = str(value)[:max_chars_per_memory]
-        
-        url = metadata.get("url", "")
-        if url:
-            context_lines.append(f"- {title} ({url})\n  {value}")
-        else:
-            context_lines.append(f"- {title}\n  {value}")
-
-    if not context_lines:
-        return None
-
-    return "Relevant memories:\n" + "\n\n".join(context_lines)
+    out: List[str] = []
+    if memories and _write_memory_context(out, memories, max_memories, max_chars_per_memory):
+        return "".join(out)
+    return None
 
 
 def build_recent_agent_runs_context(
@@ -55,26 +150,10 @@ def build_recent_agent_runs_context(
     Build a context block from recent agent runs.
     Useful for agents to understand previous interactions.
     """
-    if not runs or len(runs) == 0:
-        return None
-
-    context_lines: List[str] = []
-    for run in runs[:max_runs]:
-        prompt = run.get("prompt", "")[:150]  # Truncate
-        response = run.get("response", "")
-        success = run.get("success", False)
-        
-        if response:
-            response_preview = (response[:150] + "...") if len(response) > 150 else response
-            status = "✓" if success else "✗"
-            context_lines.append(
-                f"{status} Q: {prompt}\n  A: {response_preview}"
-            )
-
-    if not context_lines:
-        return None
-
-    return "Recent interactions:\n" + "\n".join(context_lines)
+    out: List[str] = []
+    if runs and _write_recent_agent_runs_context(out, runs, max_runs):
+        return "".join(out)
+    return None
 
 
 def build_tab_context(
@@ -83,22 +162,10 @@ def build_tab_context(
     """
     Build context from the currently active tab.
     """
-    if not active_tab:
-        return None
-
-    url = active_tab.get("url", "")
-    title = active_tab.get("title", "")
-    
-    if not url and not title:
-        return None
-
-    parts: List[str] = []
-    if title:
-        parts.append(f"Page: {title}")
-    if url:
-        parts.append(f"URL: {url}")
-
-    return "Current page:\n" + "\n".join(parts)
+    out: List[str] = []
+    if active_tab and _write_tab_context(out, active_tab):
+        return "".join(out)
+    return None
 
 
 def build_document_context(
@@ -109,27 +176,10 @@ def build_document_context(
     """
     Build context from uploaded documents.
     """
-    if not documents or len(documents) == 0:
-        return None
-
-    context_lines: List[str] = []
-    for doc in documents[:max_documents]:
-        name = doc.get("name", "Untitled")
-        text = doc.get("text", "")
-        doc_type = doc.get("type", "unknown")
-        
-        # Truncate if needed
-        if isinstance(text, str) and len(text) > max_chars_per_document:
-            text = text[:max_chars_per_document] + "..."
-        elif not isinstance(text, str):
-            text = str(text)[:max_chars_per_document]
-        
-        context_lines.append(f"Document: {name} ({doc_type})\n{text}")
-
-    if not context_lines:
-        return None
-
-    return "Uploaded documents:\n" + "\n\n---\n\n".join(context_lines)
+    out: List[str] = []
+    if documents and _write_document_context(out, documents, max_documents, max_chars_per_document):
+        return "".join(out)
+    return None
 
 
 def build_enhanced_context(
@@ -140,52 +190,54 @@ def build_enhanced_context(
     """
     Build an enhanced context block from various context sources.
     Combines memories, agent runs, tab context, etc.
+    Sections are written into one list and joined once at the end.
     """
     if not context_data:
         return ""
 
-    context_parts: List[str] = []
+    out: List[str] = ["\n\n"]
+    has_sections = False
+
+    def section(write, *args) -> None:
+        nonlocal has_sections
+        mark = len(out)
+        if has_sections:
+            out.append(_SECTION_SEPARATOR)
+        if write(out, *args):
+            has_sections = True
+        else:
+            del out[mark:]
 
     # Memory context
     memories = context_data.get("memories") or context_data.get("memory")
     if memories:
-        mem_context = build_memory_context(memories, max_memories)
-        if mem_context:
-            context_parts.append(mem_context)
+        section(_write_memory_context, memories, max_memories, 300)
 
     # Agent runs context
     runs = context_data.get("agent_runs") or context_data.get("runs")
     if runs:
-        runs_context = build_recent_agent_runs_context(runs, max_runs)
-        if runs_context:
-            context_parts.append(runs_context)
+        section(_write_recent_agent_runs_context, runs, max_runs)
 
     # Tab context
     active_tab = context_data.get("active_tab") or context_data.get("tab")
     if active_tab:
-        tab_context = build_tab_context(active_tab)
-        if tab_context:
-            context_parts.append(tab_context)
+        section(_write_tab_context, active_tab)
 
     # Document context
     documents = context_data.get("documents")
     if documents:
-        doc_context = build_document_context(documents, max_documents=5, max_chars_per_document=2000)
-        if doc_context:
-            context_parts.append(doc_context)
+        section(_write_document_context, documents, 5, 2000)
 
     # Custom context (passed directly)
     custom = context_data.get("custom") or context_data.get("additional")
     if custom:
-        if isinstance(custom, str):
-            context_parts.append(custom)
-        elif isinstance(custom, dict):
-            context_parts.append(str(custom))
+        section(_write_custom_context, custom)
 
-    if not context_parts:
+    if not has_sections:
         return ""
 
-    return "\n\n" + "\n\n---\n\n".join(context_parts) + "\n\n"
+    out.append("\n\n")
+    return "".join(out)
 
 
 def estimate_context_tokens(context: str, chars_per_token: float = 4.0) -> int:
@@ -0,0 +1,56 @@
+"""
+Bounded LRU Store - Dict-compatible in-memory store with a size cap
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from typing import Any, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUStore(OrderedDict[K, V]):
+    """
+    OrderedDict that evicts the least recently used entry once maxsize is reached.
+
+    Reads (``[]`` and ``get``) and writes both mark an entry as most recently
+    used, so call sites can keep treating it as a plain dict.
+    """
+
+    def __init__(self, maxsize: int = 10_000):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key: K) -> V:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key: K, default: Any = None) -> Any:
+        value = super().get(key, _MISSING)
+        if value is _MISSING:
+            return default
+        self.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        if key in self:
+            self.move_to_end(key)
+        super().__setitem__(key, value)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
+
+    def copy(self) -> LRUStore[K, V]:
+        # OrderedDict.copy calls type(self)(self), which would pass the store as maxsize
+        clone = type(self)(self.maxsize)
+        clone.update(self.items())
+        return clone
+
+    def __reduce__(self):
+        # copy.copy/deepcopy/pickle rebuild with the same maxsize; items() reads
+        # without going through __getitem__, so the source keeps its order
+        return type(self), (self.maxsize,), None, None, iter(self.items())
@@ -0,0 +1,140 @@
+"""
+Metrics Archive Service - Move old AI task metrics to Parquet cold storage
+
+Dashboards only look back a week, so rows older than the retention window are
+written to a Parquet dataset (partitioned by kind, sorted by timestamp) and
+removed from the hot ai_task_metrics table. Opt-in via AI_METRICS_ARCHIVE_DAYS;
+requires pyarrow (pinned in requirements.txt).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import calendar
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional
+
+from sqlalchemy import delete, select
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as pa_dataset
+except ImportError:  # pyarrow is optional; archiving is skipped without it
+    pa = None
+    pa_dataset = None
+
+ARCHIVE_INTERVAL_SECONDS = 24 * 60 * 60
+# Summary, timeline and top-errors accept hours<=168 and nothing reads the
+# archive back, so rows younger than ceil(168 / 24) days must stay in the table
+MIN_ARCHIVE_DAYS = 7
+_CHUNK_ROWS = 50_000
+
+_archive_task: Optional[asyncio.Task] = None
+
+
+def _resolve_archive_dir() -> Path:
+    """AI_METRICS_ARCHIVE_DIR, defaulting to <repo>/logs/metrics_archive"""
+    override = os.getenv("AI_METRICS_ARCHIVE_DIR")
+    if override:
+        return Path(override)
+
+    # apps/api/services -> repo root = parents[3]
+    repo_root = Path(__file__).resolve().parents[3]
+    return repo_root / "logs" / "metrics_archive"
+
+
+def archive_old_metrics(engine: Engine, older_than_days: int, archive_dir: Path) -> int:
+    """
+    Write metrics older than the cutoff to Parquet, then delete them.
+    Runs in one transaction, so nothing is deleted if writing fails.
+    Returns the number of archived rows.
+    """
+    if pa is None:
+        logger.warning("pyarrow not installed, skipping ai_task metrics archive")
+        return 0
+
+    from apps.api.models import AITaskMetric
+
+    table = AITaskMetric.__table__
+    names = [column.name for column in table.columns]
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    run_stamp = calendar.timegm(cutoff.utctimetuple())
+    archived = 0
+
+    with engine.begin() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=_CHUNK_ROWS).execute(
+            select(table).where(table.c.timestamp < cutoff).order_by(table.c.timestamp)
+        )
+        for chunk_no, rows in enumerate(result.partitions()):
+            columns = {name: [row[idx] for row in rows] for idx, name in enumerate(names)}
+            # JSON blobs don't map onto a fixed Parquet schema; keep them as text
+            columns["metadata_json"] = [
+                json.dumps(value) if value is not None else None for value in columns["metadata_json"]
+            ]
+            pa_dataset.write_dataset(
+                pa.table(columns),
+                archive_dir,
+                format="parquet",
+                partitioning=["kind"],
+                partitioning_flavor="hive",
+                basename_template=f"metrics-{run_stamp}-{chunk_no}-{{i}}.parquet",
+                existing_data_behavior="overwrite_or_ignore",
+            )
+            archived += len(rows)
+
+        if archived:
+            conn.execute(delete(table).where(table.c.timestamp < cutoff))
+
+    if archived:
+        logger.info("Archived %d ai_task metrics older than %s to %s", archived, cutoff, archive_dir)
+    return archived
+
+
+async def _archive_loop(engine: Engine, older_than_days: int, archive_dir: Path) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(archive_old_metrics, engine, older_than_days, archive_dir)
+        except Exception as exc:
+            logger.warning("Failed to archive ai_task metrics: %s", exc)
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+
+
+def start_metrics_archiver(engine: Engine) -> Optional[asyncio.Task]:
+    """
+    Archive metrics older than AI_METRICS_ARCHIVE_DAYS (at least MIN_ARCHIVE_DAYS)
+    once a day. Disabled when the variable is unset.
+    """
+    global _archive_task
+    days = os.getenv("AI_METRICS_ARCHIVE_DAYS")
+    if _archive_task is None and days:
+        older_than_days = int(days)
+        if older_than_days < MIN_ARCHIVE_DAYS:
+            logger.warning(
+                "AI_METRICS_ARCHIVE_DAYS=%d would archive rows the metrics endpoints still serve; using %d",
+                older_than_days,
+                MIN_ARCHIVE_DAYS,
+            )
+            older_than_days = MIN_ARCHIVE_DAYS
+        _archive_task = asyncio.create_task(
+            _archive_loop(engine, older_than_days, _resolve_archive_dir())
+        )
+    return _archive_task
+
+
+async def stop_metrics_archiver() -> None:
+    """Cancel the periodic archive task"""
+    global _archive_task
+    if _archive_task is not None:
+        _archive_task.cancel()
+        try:
+            await _archive_task
+        except asyncio.CancelledError:
+            pass
+        _archive_task = None
@@ -0,0 +1,111 @@
+"""
+Metrics Rollup Service - Pre-aggregated 5-minute buckets for AI task metrics
+
+On PostgreSQL the timeline endpoint reads from a materialized view instead of
+re-scanning raw ai_task_metrics rows on every dashboard poll. The view and its
+unique index are created by alembic revision 0004. Other dialects (SQLite in
+local development) keep using the raw-table path.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+ROLLUP_VIEW = "ai_task_metric_rollup_5m"
+ROLLUP_BUCKET_SECONDS = 300
+
+_view_ready = False
+_refresh_task: Optional[asyncio.Task] = None
+
+
+def rollup_supported(engine: Engine) -> bool:
+    """Materialized views are only used on PostgreSQL"""
+    return engine.dialect.name == "postgresql"
+
+
+def rollup_available() -> bool:
+    """True once the view exists and readers may query it"""
+    return _view_ready
+
+
+def refresh_rollup_view(engine: Engine) -> None:
+    """Refresh the rollup without blocking readers"""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {ROLLUP_VIEW}"))
+
+
+async def _refresh_loop(engine: Engine, interval_seconds: float) -> None:
+    while True:
+        try:
+            await asyncio.to_thread(refresh_rollup_view, engine)
+        except Exception as exc:
+            logger.warning("Failed to refresh %s: %s", ROLLUP_VIEW, exc)
+        await asyncio.sleep(interval_seconds)
+
+
+def start_rollup_refresher(engine: Engine) -> Optional[asyncio.Task]:
+    """
+    Refresh the view periodically (PostgreSQL only, once migrations created it).
+    Interval comes from AI_METRICS_ROLLUP_REFRESH_SECONDS (default 60).
+    """
+    global _refresh_task, _view_ready
+    if _refresh_task is None and rollup_supported(engine):
+        _view_ready = ROLLUP_VIEW in inspect(engine).get_materialized_view_names()
+        if not _view_ready:
+            logger.warning("%s is missing; run alembic upgrade head", ROLLUP_VIEW)
+            return None
+        interval = float(os.getenv("AI_METRICS_ROLLUP_REFRESH_SECONDS", "60"))
+        _refresh_task = asyncio.create_task(_refresh_loop(engine, interval))
+    return _refresh_task
+
+
+def query_rollup_timeline(db, cutoff_epoch: int, interval_seconds: int, kind: Optional[str] = None) -> list:
+    """
+    Re-aggregate the 5-minute rollup into interval_seconds buckets in SQL.
+    interval_seconds must be a multiple of ROLLUP_BUCKET_SECONDS.
+    """
+    kind_filter = "AND kind = :kind" if kind else ""
+    sql = text(
+        f"""
+        SELECT
+            (bucket_epoch / :interval) * :interval AS bucket,
+            sum(request_count) AS request_count,
+            sum(success_count) AS success_count,
+            sum(error_count) AS error_count,
+            sum(cost_sum) AS cost_sum,
+            sum(tokens_sum) AS tokens_sum,
+            sum(latency_sum) AS latency_sum
+        FROM {ROLLUP_VIEW}
+        WHERE bucket_epoch >= :cutoff {kind_filter}
+        GROUP BY 1
+        ORDER BY 1
+        """
+    )
+    params = {
+        "interval": interval_seconds,
+        # Include the partially covered first bucket
+        "cutoff": cutoff_epoch // ROLLUP_BUCKET_SECONDS * ROLLUP_BUCKET_SECONDS,
+    }
+    if kind:
+        params["kind"] = kind
+    return db.execute(sql, params).all()
+
+
+async def stop_rollup_refresher() -> None:
+    """Cancel the periodic refresh task"""
+    global _refresh_task
+    if _refresh_task is not None:
+        _refresh_task.cancel()
+        try:
+            await _refresh_task
+        except asyncio.CancelledError:
+            pass
+        _refresh_task = None
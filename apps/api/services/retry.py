@@ -6,13 +6,38 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import re
 from functools import wraps
-from typing import Callable, TypeVar, Optional, List, Tuple
+from typing import Callable, TypeVar, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# One case-insensitive scan instead of a substring test per keyword
+_RETRYABLE_MESSAGE_RE = re.compile(
+    r"timeout|connection|network|temporary|rate limit|429|502|503|504"
+    r"|service unavailable|too many requests",
+    re.IGNORECASE,
+)
+_RETRYABLE_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+# Error text patterns for format_user_friendly_error, in priority order
+_USER_ERROR_MESSAGES = {
+    "auth": "API authentication failed. Please check your API key configuration.",
+    "timeout": "Request timed out. The service may be slow or unavailable. Please try again.",
+    "rate": "Rate limit exceeded. Please wait a moment and try again.",
+    "conn": "Network error. Please check your internet connection and try again.",
+    "unavail": "Service temporarily unavailable. Please try again in a few moments.",
+    "quota": "Usage limit reached. Please check your account limits or upgrade your plan.",
+}
+_USER_ERROR_PRIORITY = {name: idx for idx, name in enumerate(_USER_ERROR_MESSAGES)}
+_USER_ERROR_RE = re.compile(
+    r"(?P<auth>api key|authentication)|(?P<timeout>timeout)|(?P<rate>rate limit|429)"
+    r"|(?P<conn>connection|network)|(?P<unavail>service unavailable|503)|(?P<quota>quota|limit)",
+    re.IGNORECASE,
+)
+
 
 class RetryableError(Exception):
     """Error that can be retried"""
@@ -30,7 +55,7 @@ async def retry_with_backoff(
     initial_delay: float = 1.0,
     max_delay: float = 10.0,
     exponential_base: float = 2.0,
-    retryable_errors: Optional[List[type]] = None,
+    retryable_errors: Tuple[type, ...] = (Exception,),
     *args,
     **kwargs,
 ) -> T:
@@ -43,7 +68,7 @@ async def retry_with_backoff(
         initial_delay: Initial delay in seconds
         max_delay: Maximum delay in seconds
         exponential_base: Base for exponential backoff
-        retryable_errors: List of exception types that should be retried
+        retryable_errors: Tuple of exception types that should be retried
         *args, **kwargs: Arguments to pass to func
     
     Returns:
@@ -52,18 +77,21 @@ async def retry_with_backoff(
     Raises:
         Last exception if all attempts fail
     """
-    if retryable_errors is None:
-        retryable_errors = [Exception]
-    
     last_exception: Optional[Exception] = None
+    # Invariant across attempts, so work these out once
+    is_coroutine = asyncio.iscoroutinefunction(func)
+    delays = [
+        min(initial_delay * (exponential_base ** i), max_delay)
+        for i in range(max_attempts - 1)
+    ]
     
     for attempt in range(1, max_attempts + 1):
         try:
-            if asyncio.iscoroutinefunction(func):
+            if is_coroutine:
                 return await func(*args, **kwargs)
             else:
                 return func(*args, **kwargs)
-        except tuple(retryable_errors) as exc:
+        except retryable_errors as exc:
             last_exception = exc
             
             # Don't retry on last attempt
@@ -74,11 +102,8 @@ async def retry_with_backoff(
                 )
                 raise
             
-            # Calculate delay with exponential backoff
-            delay = min(
-                initial_delay * (exponential_base ** (attempt - 1)),
-                max_delay,
-            )
+            # Exponential backoff, capped at max_delay
+            delay = delays[attempt - 1]
             
             logger.debug(
                 f"Retry attempt {attempt}/{max_attempts} failed: {exc}. "
@@ -108,22 +133,7 @@ def is_retryable_error(error: Exception) -> bool:
         True if error should be retried, False otherwise
     """
     # Network errors (timeouts, connection errors)
-    error_str = str(error).lower()
-    retryable_keywords = [
-        "timeout",
-        "connection",
-        "network",
-        "temporary",
-        "rate limit",
-        "429",
-        "502",
-        "503",
-        "504",
-        "service unavailable",
-        "too many requests",
-    ]
-    
-    if any(keyword in error_str for keyword in retryable_keywords):
+    if _RETRYABLE_MESSAGE_RE.search(str(error)):
         return True
     
     # Check error type
@@ -135,7 +145,7 @@ def is_retryable_error(error: Exception) -> bool:
     # Retry on specific HTTP status codes
     if hasattr(error, "status_code"):
         status = getattr(error, "status_code")
-        if status in [429, 502, 503, 504]:
+        if status in _RETRYABLE_STATUS_CODES:
             return True
         if status >= 500:  # Server errors
             return True
@@ -157,38 +167,25 @@ def format_user_friendly_error(error: Exception) -> str:
         User-friendly error message
     """
     error_msg = str(error)
-    error_type = type(error).__name__
-    
-    # Common error patterns
-    if "api key" in error_msg.lower() or "authentication" in error_msg.lower():
-        return "API authentication failed. Please check your API key configuration."
-    
-    if "timeout" in error_msg.lower():
-        return "Request timed out. The service may be slow or unavailable. Please try again."
-    
-    if "rate limit" in error_msg.lower() or "429" in error_msg:
-        return "Rate limit exceeded. Please wait a moment and try again."
-    
-    if "connection" in error_msg.lower() or "network" in error_msg.lower():
-        return "Network error. Please check your internet connection and try again."
-    
-    if "service unavailable" in error_msg.lower() or "503" in error_msg:
-        return "Service temporarily unavailable. Please try again in a few moments."
     
-    if "quota" in error_msg.lower() or "limit" in error_msg.lower():
-        return "Usage limit reached. Please check your account limits or upgrade your plan."
+    # Common error patterns; when several match, the earliest in _USER_ERROR_MESSAGES wins
+    matched = {match.lastgroup for match in _USER_ERROR_RE.finditer(error_msg)}
+    if matched:
+        return _USER_ERROR_MESSAGES[min(matched, key=_USER_ERROR_PRIORITY.__getitem__)]
     
     # Provider-specific errors
-    if "openai" in error_type.lower() or "openai" in error_msg.lower():
-        if "insufficient_quota" in error_msg.lower():
+    lowered_msg = error_msg.lower()
+    error_type = type(error).__name__.lower()
+    if "openai" in error_type or "openai" in lowered_msg:
+        if "insufficient_quota" in lowered_msg:
             return "OpenAI quota exceeded. Please check your billing and credits."
         return "OpenAI service error. Please try again or contact support."
     
-    if "anthropic" in error_type.lower() or "anthropic" in error_msg.lower():
+    if "anthropic" in error_type or "anthropic" in lowered_msg:
         return "Claude service error. Please try again or contact support."
     
-    if "ollama" in error_type.lower() or "ollama" in error_msg.lower():
-        if "connection refused" in error_msg.lower():
+    if "ollama" in error_type or "ollama" in lowered_msg:
+        if "connection refused" in lowered_msg:
             return "Ollama service not running. Please start Ollama locally or use a cloud provider."
         return "Local LLM service error. Please check Ollama installation."
     
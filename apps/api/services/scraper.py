@@ -100,7 +100,7 @@ class ScraperService:
     ) -> Dict[str, Any]:
         cache_id = cache_key(url, "scrape")
         if use_cache:
-            cached = get_cached_response(cache_id, max_age_seconds=DEFAULT_CACHE_TTL)
+            cached = await get_cached_response(cache_id, max_age_seconds=DEFAULT_CACHE_TTL)
             if cached:
                 return {**cached, "from_cache": True}
 
@@ -136,7 +136,7 @@ class ScraperService:
             }
 
             if use_cache and extraction["content"]:
-                set_cached_response(cache_id, result, ttl_seconds=DEFAULT_CACHE_TTL)
+                await set_cached_response(cache_id, result, ttl_seconds=DEFAULT_CACHE_TTL)
 
             return result
         except Exception as exc:  # pylint: disable=broad-except
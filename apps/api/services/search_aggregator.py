@@ -6,6 +6,7 @@ with advanced source ranking, deduplication, relevance scoring, and AI summariza
 
 import asyncio
 import logging
+import os
 from typing import List, Dict, Any, Optional
 import aiohttp
 from urllib.parse import quote_plus, urlparse
@@ -14,6 +15,9 @@ from datetime import datetime, timedelta
 
 logger = logging.getLogger(__name__)
 
+# Providers still running after this are dropped so one slow engine can't hold up the rest
+SEARCH_PROVIDER_TIMEOUT_SECONDS = float(os.getenv("SEARCH_PROVIDER_TIMEOUT_SECONDS", "2.0"))
+
 
 class SearchResult:
     """Represents a search result from any source"""
@@ -466,21 +470,26 @@ async def aggregate_search(
     search_tasks = []
     
     if 'duckduckgo' in sources:
-        search_tasks.append(search_duckduckgo(query, max_results=max_results))
+        search_tasks.append(asyncio.ensure_future(search_duckduckgo(query, max_results=max_results)))
     
     if 'bing' in sources:
-        search_tasks.append(search_bing(query, max_results=max_results, api_key=bing_api_key))
-    
-    # Wait for all searches to complete
-    all_results_lists = await asyncio.gather(*search_tasks, return_exceptions=True)
+        search_tasks.append(asyncio.ensure_future(search_bing(query, max_results=max_results, api_key=bing_api_key)))
     
-    # Flatten results
+    # Wait up to the provider deadline, then go with whichever sources finished
     all_results: List[SearchResult] = []
-    for results_list in all_results_lists:
-        if isinstance(results_list, list):
-            all_results.extend(results_list)
-        elif isinstance(results_list, Exception):
-            logger.debug(f"Search source failed: {results_list}")
+    if search_tasks:
+        done, pending = await asyncio.wait(search_tasks, timeout=SEARCH_PROVIDER_TIMEOUT_SECONDS)
+        for task in pending:
+            task.cancel()
+        if pending:
+            logger.debug(f"{len(pending)} search source(s) timed out for query: {query}")
+        
+        # Flatten results
+        for task in done:
+            if task.exception() is not None:
+                logger.debug(f"Search source failed: {task.exception()}")
+            else:
+                all_results.extend(task.result())
     
     # Rank and deduplicate
     ranked_results = rank_and_deduplicate_results(all_results, query, max_results)
@@ -512,3 +521,43 @@ async def aggregate_search(
     # Backward compatible: return list if summary not requested
     return results
 
+
+
+# In-flight aggregate_search calls keyed by their arguments (singleflight)
+_inflight_searches: Dict[tuple, "asyncio.Task[Any]"] = {}
+
+
+async def aggregate_search_coalesced(
+    query: str,
+    sources: List[str] = None,
+    max_results: int = 20,
+    bing_api_key: Optional[str] = None,
+    include_summary: bool = False,
+    summary_length: int = 200,
+) -> Any:
+    """
+    aggregate_search, but concurrent identical calls share one upstream fan-out.
+    The shared call runs as its own task, so a cancelled caller doesn't cancel it
+    for the others.
+    """
+    key = (query, tuple(sources or ()), max_results, include_summary, summary_length)
+    task = _inflight_searches.get(key)
+    if task is None:
+        task = asyncio.ensure_future(
+            aggregate_search(
+                query=query,
+                sources=sources,
+                max_results=max_results,
+                bing_api_key=bing_api_key,
+                include_summary=include_summary,
+                summary_length=summary_length,
+            )
+        )
+        _inflight_searches[key] = task
+
+        def _forget(done: "asyncio.Task[Any]") -> None:
+            if _inflight_searches.get(key) is done:
+                del _inflight_searches[key]
+
+        task.add_done_callback(_forget)
+    return await asyncio.shield(task)
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
 import asyncio
+import atexit
 import json
 import logging
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, Optional
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+try:
+    import orjson
+
+    def _encode_line(obj: Dict[str, Any]) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+except ImportError:  # orjson is optional
+    def _encode_line(obj: Dict[str, Any]) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
 # Lazy import to avoid circular dependencies
 _db_session = None
 
@@ -42,76 +54,213 @@ def _resolve_metrics_path() -> Path:
     return repo_root / "logs" / "ai_tasks.jsonl"
 
 
+def _metric_row(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a telemetry payload onto AITaskMetric column values"""
+    usage = payload.get("usage", {})
+    if isinstance(usage, dict):
+        prompt_tokens = usage.get("prompt_tokens")
+        completion_tokens = usage.get("completion_tokens")
+        total_tokens = usage.get("total_tokens")
+    else:
+        prompt_tokens = completion_tokens = total_tokens = None
+
+    return {
+        "timestamp": datetime.utcnow(),
+        "status": payload.get("status", "unknown"),
+        "kind": payload.get("kind", "unknown"),
+        "mode": payload.get("mode"),
+        "provider": payload.get("provider", "unknown"),
+        "model": payload.get("model", "unknown"),
+        "latency_ms": payload.get("latency_ms", 0),
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": total_tokens,
+        "estimated_cost_usd": payload.get("estimated_cost_usd"),
+        "cost_tier": payload.get("cost_tier"),
+        "prompt_chars": payload.get("prompt_chars"),
+        "has_context": payload.get("has_context", False),
+        "citations_count": payload.get("citations_count"),
+        "client_id": payload.get("client_id"),
+        "error": payload.get("error"),
+        "metadata_json": payload.get("metadata"),
+    }
+
+
+# Telemetry I/O runs on its own worker so it never queues behind request-path
+# to_thread/run_in_executor calls; a single thread also means a single reusable Session
+_telemetry_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telemetry")
+_thread_sessions = threading.local()
+
+
+def _get_thread_session(SessionLocal):
+    """Session reused across calls on the current thread (replaced if the factory changes)"""
+    entry = getattr(_thread_sessions, "entry", None)
+    if entry is None or entry[0] is not SessionLocal:
+        if entry is not None:
+            entry[1].close()
+        entry = (SessionLocal, SessionLocal())
+        _thread_sessions.entry = entry
+    return entry[1]
+
+
+def _persist_rows(SessionLocal, rows: List[Dict[str, Any]]) -> None:
+    """Insert metric rows with a single executemany"""
+    try:
+        from sqlalchemy import insert
+        from apps.api.models import AITaskMetric
+        db = _get_thread_session(SessionLocal)
+        try:
+            db.execute(insert(AITaskMetric), rows)
+            db.commit()  # Also hands the connection back to the pool
+        except Exception as exc:
+            db.rollback()
+            logger.warning("Failed to persist %d ai_task metric(s) to database: %s", len(rows), exc)
+    except Exception as exc:
+        logger.warning("Database persistence failed: %s", exc)
+
+
+# Append handle kept open across writes; reopened if the resolved path changes
+_jsonl_handle: Optional[BinaryIO] = None
+_jsonl_handle_path: Optional[Path] = None
+_jsonl_lock = threading.Lock()
+
+
+def _get_jsonl_handle(metrics_path: Path) -> BinaryIO:
+    """Return the cached append handle for metrics_path (caller holds _jsonl_lock)"""
+    global _jsonl_handle, _jsonl_handle_path
+    if _jsonl_handle is None or _jsonl_handle_path != metrics_path:
+        if _jsonl_handle is not None:
+            _jsonl_handle.close()
+            _jsonl_handle = None
+        metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        _jsonl_handle = metrics_path.open("ab")
+        _jsonl_handle_path = metrics_path
+    return _jsonl_handle
+
+
+@atexit.register
+def _close_jsonl_handle() -> None:
+    global _jsonl_handle
+    with _jsonl_lock:
+        if _jsonl_handle is not None:
+            _jsonl_handle.close()
+            _jsonl_handle = None
+
+
+def _write_lines(metrics_path: Path, lines: List[bytes]) -> None:
+    """Append encoded JSONL lines to the cached handle with a single write"""
+    global _jsonl_handle
+    with _jsonl_lock:
+        try:
+            handle = _get_jsonl_handle(metrics_path)
+            handle.write(b"".join(lines))
+            handle.flush()
+        except Exception as exc:
+            logger.warning("Failed to persist ai_task telemetry to JSONL: %s", exc)
+            _jsonl_handle = None  # Reopen on the next write
+
+
+def _flush_batch(SessionLocal, batch: List[Tuple[Optional[Dict[str, Any]], bytes]]) -> None:
+    """Write (db_row, jsonl_line) entries: one JSONL append and one executemany"""
+    _write_lines(_resolve_metrics_path(), [line for _, line in batch])
+    rows = [row for row, _ in batch if row is not None]
+    if SessionLocal and rows:
+        _persist_rows(SessionLocal, rows)
+
+
+# Batched metric writer (started from the app lifespan)
+_BATCH_SIZE = int(os.getenv("AI_METRICS_BATCH_SIZE", "100"))
+_FLUSH_INTERVAL_SECONDS = float(os.getenv("AI_METRICS_FLUSH_SECONDS", "0.5"))
+_QUEUE_MAXSIZE = int(os.getenv("AI_METRICS_QUEUE_MAX", "10000"))
+
+_metric_queue: Optional[asyncio.Queue] = None
+_writer_task: Optional[asyncio.Task] = None
+_STOP = object()  # Queued last on shutdown so the writer flushes everything before it
+
+
+def _enqueue(queue: asyncio.Queue, entry: Any) -> None:
+    """Queue an entry for the writer, dropping the oldest one if the queue is full"""
+    if queue.full():
+        queue.get_nowait()
+        logger.warning("ai_task metric queue full, dropping oldest metric")
+    queue.put_nowait(entry)
+
+
+async def _drain_batch(queue: asyncio.Queue) -> List[Any]:
+    """Wait for one entry, then collect up to _BATCH_SIZE entries or until the flush interval passes"""
+    batch = [await queue.get()]
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + _FLUSH_INTERVAL_SECONDS
+    while len(batch) < _BATCH_SIZE and batch[-1] is not _STOP:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        try:
+            batch.append(await asyncio.wait_for(queue.get(), remaining))
+        except asyncio.TimeoutError:
+            break
+    return batch
+
+
+async def _metric_writer(SessionLocal, queue: asyncio.Queue) -> None:
+    while True:
+        batch = await _drain_batch(queue)
+        stopping = batch[-1] is _STOP
+        if stopping:
+            batch.pop()
+        if batch:
+            await asyncio.get_running_loop().run_in_executor(
+                _telemetry_executor, _flush_batch, SessionLocal, batch
+            )
+        if stopping:
+            return
+
+
+def start_metric_writer() -> Optional[asyncio.Task]:
+    """Start the background task that batches metric inserts and JSONL appends"""
+    global _metric_queue, _writer_task
+    if _writer_task is None:
+        SessionLocal = _get_db_session()
+        _metric_queue = asyncio.Queue(maxsize=_QUEUE_MAXSIZE)
+        _writer_task = asyncio.create_task(_metric_writer(SessionLocal, _metric_queue))
+    return _writer_task
+
+
+async def stop_metric_writer() -> None:
+    """Flush whatever is still queued, then stop the writer"""
+    global _metric_queue, _writer_task
+    if _writer_task is None:
+        return
+    task, queue = _writer_task, _metric_queue
+    # Later metrics are written directly while the queue drains
+    _writer_task = _metric_queue = None
+    if task.done():  # Writer already exited; metrics have been written directly since
+        return
+    await queue.put(_STOP)  # Waits for room rather than evicting a queued metric
+    await task
+
+
 async def record_ai_task_metric(payload: Dict[str, Any]) -> None:
     """
     Append a single AI task telemetry payload to the metrics log.
     Persists to both database (if available) and JSONL file.
+    Both are batched by the metric writer when it is running.
     """
-    # Try database first
     SessionLocal = _get_db_session()
-    if SessionLocal:
-        def _persist_to_db() -> None:
-            try:
-                from apps.api.models import AITaskMetric
-                db = SessionLocal()
-                try:
-                    usage = payload.get("usage", {})
-                    if isinstance(usage, dict):
-                        prompt_tokens = usage.get("prompt_tokens")
-                        completion_tokens = usage.get("completion_tokens")
-                        total_tokens = usage.get("total_tokens")
-                    else:
-                        prompt_tokens = completion_tokens = total_tokens = None
-                    
-                    metric = AITaskMetric(
-                        timestamp=datetime.utcnow(),
-                        status=payload.get("status", "unknown"),
-                        kind=payload.get("kind", "unknown"),
-                        mode=payload.get("mode"),
-                        provider=payload.get("provider", "unknown"),
-                        model=payload.get("model", "unknown"),
-                        latency_ms=payload.get("latency_ms", 0),
-                        prompt_tokens=prompt_tokens,
-                        completion_tokens=completion_tokens,
-                        total_tokens=total_tokens,
-                        estimated_cost_usd=payload.get("estimated_cost_usd"),
-                        cost_tier=payload.get("cost_tier"),
-                        prompt_chars=payload.get("prompt_chars"),
-                        has_context=payload.get("has_context", False),
-                        citations_count=payload.get("citations_count"),
-                        client_id=payload.get("client_id"),
-                        error=payload.get("error"),
-                        metadata_json=payload.get("metadata"),
-                    )
-                    db.add(metric)
-                    db.commit()
-                except Exception as exc:
-                    db.rollback()
-                    logger.warning("Failed to persist ai_task metric to database: %s", exc)
-                finally:
-                    db.close()
-            except Exception as exc:
-                logger.warning("Database persistence failed: %s", exc)
-
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, _persist_to_db)
+    row = _metric_row(payload) if SessionLocal else None
 
     # Also write to JSONL (fallback and backup)
-    metrics_path = _resolve_metrics_path()
     enriched = {
         "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z"),
         **payload,
     }
-    line = json.dumps(enriched, ensure_ascii=False)
-
-    def _write_line() -> None:
-        try:
-            metrics_path.parent.mkdir(parents=True, exist_ok=True)
-            with metrics_path.open("a", encoding="utf-8") as handle:
-                handle.write(line + "\n")
-        except Exception as exc:
-            logger.warning("Failed to persist ai_task telemetry to JSONL: %s", exc)
+    line = _encode_line(enriched)
 
-    loop = asyncio.get_event_loop()
-    await loop.run_in_executor(None, _write_line)
+    # A writer that died (e.g. cancelled) would leave queued metrics unwritten
+    if _writer_task is not None and not _writer_task.done():
+        _enqueue(_metric_queue, (row, line))
+    else:
+        await asyncio.get_running_loop().run_in_executor(
+            _telemetry_executor, _flush_batch, SessionLocal, [(row, line)]
+        )
 
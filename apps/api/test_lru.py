@@ -0,0 +1,74 @@
+import copy
+import pickle
+
+from apps.api.services.lru import LRUStore
+
+
+def _store(maxsize=3):
+    store = LRUStore(maxsize=maxsize)
+    for key in "abc":
+        store[key] = key.upper()
+    return store
+
+
+def test_evicts_least_recently_used_past_maxsize():
+    store = _store()
+    store["d"] = "D"
+    assert list(store) == ["b", "c", "d"]
+
+
+def test_get_and_getitem_mark_entry_as_recent():
+    store = _store()
+    assert store.get("a") == "A"
+    assert store["b"] == "B"
+    assert list(store) == ["c", "a", "b"]
+    store["d"] = "D"
+    assert "c" not in store
+
+
+def test_get_missing_key_returns_default():
+    store = _store()
+    assert store.get("zz") is None
+    assert store.get("zz", 0) == 0
+    assert list(store) == ["a", "b", "c"]
+
+
+def test_overwrite_marks_entry_as_recent_without_evicting():
+    store = _store()
+    store["a"] = "A2"
+    assert list(store) == ["b", "c", "a"]
+    assert len(store) == 3
+
+
+def test_pop_removes_entry():
+    store = _store()
+    assert store.pop("b") == "B"
+    assert store.pop("zz", None) is None
+    assert list(store) == ["a", "c"]
+
+
+def test_copy_keeps_maxsize_and_source_order():
+    store = _store()
+    clone = store.copy()
+    assert isinstance(clone, LRUStore)
+    assert clone.maxsize == 3
+    assert list(clone) == ["a", "b", "c"]
+    assert list(store) == ["a", "b", "c"]
+    clone["d"] = "D"
+    assert list(clone) == ["b", "c", "d"]
+    assert list(store) == ["a", "b", "c"]
+
+
+def test_copy_module_and_pickle_keep_maxsize():
+    store = _store()
+    for clone in (copy.copy(store), copy.deepcopy(store), pickle.loads(pickle.dumps(store))):
+        assert clone.maxsize == 3
+        assert list(clone.items()) == [("a", "A"), ("b", "B"), ("c", "C")]
+    assert list(store) == ["a", "b", "c"]
+
+
+def test_dict_conversion_keeps_source_order():
+    store = _store()
+    assert dict(store) == {"a": "A", "b": "B", "c": "C"}
+    assert {**store} == {"a": "A", "b": "B", "c": "C"}
+    assert list(store) == ["a", "b", "c"]
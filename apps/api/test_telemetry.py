@@ -2,6 +2,7 @@ import asyncio
 import json
 
 
+from apps.api.services import telemetry
 from apps.api.services.telemetry import record_ai_task_metric
 
 
@@ -32,3 +33,105 @@ def test_record_ai_task_metric_writes_jsonl(monkeypatch, tmp_path):
     assert entry["model"] == payload["model"]
     assert "timestamp" in entry
 
+
+
+def _capture_batches(monkeypatch):
+    """Record each flushed batch's payload ids instead of writing JSONL/DB rows"""
+    batches = []
+    monkeypatch.setattr(telemetry, "_get_db_session", lambda: None)
+    monkeypatch.setattr(
+        telemetry,
+        "_flush_batch",
+        lambda SessionLocal, batch: batches.append([json.loads(line)["id"] for _, line in batch]),
+    )
+    return batches
+
+
+async def _wait_for(condition, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def test_metric_writer_flushes_full_batches(monkeypatch):
+    batches = _capture_batches(monkeypatch)
+    monkeypatch.setattr(telemetry, "_BATCH_SIZE", 3)
+    monkeypatch.setattr(telemetry, "_FLUSH_INTERVAL_SECONDS", 60)
+
+    async def run():
+        telemetry.start_metric_writer()
+        for i in range(7):
+            await record_ai_task_metric({"id": i})
+        await _wait_for(lambda: len(batches) == 2)
+        assert batches == [[0, 1, 2], [3, 4, 5]]
+        await telemetry.stop_metric_writer()
+
+    asyncio.run(run())
+    assert batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_metric_writer_flushes_after_interval(monkeypatch):
+    batches = _capture_batches(monkeypatch)
+    monkeypatch.setattr(telemetry, "_BATCH_SIZE", 100)
+    monkeypatch.setattr(telemetry, "_FLUSH_INTERVAL_SECONDS", 0.05)
+
+    async def run():
+        telemetry.start_metric_writer()
+        await record_ai_task_metric({"id": 0})
+        await record_ai_task_metric({"id": 1})
+        await _wait_for(lambda: batches)
+        assert batches == [[0, 1]]
+        await telemetry.stop_metric_writer()
+
+    asyncio.run(run())
+    assert batches == [[0, 1]]
+
+
+def test_stop_metric_writer_drains_queue(monkeypatch):
+    batches = _capture_batches(monkeypatch)
+    monkeypatch.setattr(telemetry, "_BATCH_SIZE", 100)
+    monkeypatch.setattr(telemetry, "_FLUSH_INTERVAL_SECONDS", 60)
+
+    async def run():
+        task = telemetry.start_metric_writer()
+        for i in range(5):
+            await record_ai_task_metric({"id": i})
+        await telemetry.stop_metric_writer()
+        assert task.done()
+        # Once stopped, metrics are written directly
+        await record_ai_task_metric({"id": 5})
+
+    asyncio.run(run())
+    assert batches == [[0, 1, 2, 3, 4], [5]]
+
+
+def test_full_metric_queue_drops_oldest(monkeypatch):
+    batches = _capture_batches(monkeypatch)
+    monkeypatch.setattr(telemetry, "_BATCH_SIZE", 100)
+    monkeypatch.setattr(telemetry, "_FLUSH_INTERVAL_SECONDS", 60)
+    monkeypatch.setattr(telemetry, "_QUEUE_MAXSIZE", 2)
+
+    async def run():
+        telemetry.start_metric_writer()
+        # No await yields to the writer in between, so the queue fills up
+        for i in range(3):
+            await record_ai_task_metric({"id": i})
+        await telemetry.stop_metric_writer()
+
+    asyncio.run(run())
+    assert batches == [[1, 2]]
+
+
+def test_dead_metric_writer_falls_back_to_direct_writes(monkeypatch):
+    batches = _capture_batches(monkeypatch)
+
+    async def run():
+        task = telemetry.start_metric_writer()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        await record_ai_task_metric({"id": 0})
+        await telemetry.stop_metric_writer()
+
+    asyncio.run(run())
+    assert batches == [[0]]
@@ -3,32 +3,53 @@ import os
 from functools import lru_cache
 
 import numpy as np
+import onnxruntime
 from optimum.onnxruntime import ORTModelForFeatureExtraction
 from transformers import AutoTokenizer
 
 EMBED_MODEL_ID = os.getenv("EMBED_MODEL", "BAAI/bge-small-en-v1.5")
+# e.g. model_quantized.onnx from quantize.py; unset loads the default FP32 export
+EMBED_MODEL_FILE = os.getenv("EMBED_MODEL_FILE")
+EMBED_INTRA_OP_THREADS = int(os.getenv("EMBED_INTRA_OP_THREADS", str(os.cpu_count() or 4)))
 logger = logging.getLogger("redix.embed")
 
 
+def _session_options() -> onnxruntime.SessionOptions:
+    options = onnxruntime.SessionOptions()
+    options.intra_op_num_threads = EMBED_INTRA_OP_THREADS
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Reuse buffers across calls; input shapes repeat for short texts
+    options.enable_mem_pattern = True
+    options.enable_cpu_mem_arena = True
+    return options
+
+
 @lru_cache(maxsize=1)
 def _load_model():
     try:
+        extra = {"file_name": EMBED_MODEL_FILE} if EMBED_MODEL_FILE else {}
         model = ORTModelForFeatureExtraction.from_pretrained(
             EMBED_MODEL_ID,
             provider="CPUExecutionProvider",
+            session_options=_session_options(),
+            provider_options={"use_arena": "1"},
+            **extra,
         )
         tokenizer = AutoTokenizer.from_pretrained(EMBED_MODEL_ID)
-        logger.info("Embedding model loaded", extra={"model_id": EMBED_MODEL_ID})
+        logger.info("Embedding model loaded", extra={"model_id": EMBED_MODEL_ID, "model_file": EMBED_MODEL_FILE})
         return model, tokenizer
     except Exception as exc:
         logger.exception("Failed to load embedding model", extra={"model_id": EMBED_MODEL_ID, "error": str(exc)})
         raise
 
 
-def embed_text(text: str) -> list[float]:
+def embed_texts(texts: list[str]) -> np.ndarray:
+    """Embed a batch with one tokenizer call and one forward pass; returns (n, dim) unit vectors."""
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
     model, tokenizer = _load_model()
     tokens = tokenizer(
-        text,
+        texts,
         return_tensors="np",
         padding=True,
         truncation=True,
@@ -36,11 +57,15 @@ def embed_text(text: str) -> list[float]:
     )
     outputs = model(**tokens)
     # CLS pooling
-    vector = outputs.last_hidden_state[:, 0, :].squeeze(0)
-    norm = np.linalg.norm(vector)
-    if norm == 0:
+    vectors = outputs.last_hidden_state[:, 0, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    if not norms.all():
         logger.warning("Encountered zero-norm embedding vector; returning zeros")
-        return np.zeros(vector.shape, dtype=np.float32).tolist()
-    vector = vector / norm
-    return vector.tolist()
+    # Zero vectors stay zero instead of dividing by 0
+    np.divide(vectors, np.maximum(norms, 1e-12), out=vectors)
+    return vectors.astype(np.float32, copy=False)
 
+
+def embed_text(text: str) -> list[float]:
+    # psycopg2 (PG_ARRAY) and qdrant-client both take plain lists, so convert once here
+    return embed_texts([text])[0].tolist()
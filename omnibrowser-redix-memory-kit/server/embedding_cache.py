@@ -0,0 +1,91 @@
+import asyncio
+import hashlib
+import logging
+import os
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import redis
+from redis import asyncio as redis_async
+
+from embed import EMBED_MODEL_FILE, EMBED_MODEL_ID, embed_text
+
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+EMBED_CACHE_SIZE = int(os.getenv("EMBED_CACHE_SIZE", "4096"))
+EMBED_CACHE_TTL_SECONDS = int(os.getenv("EMBED_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Each ONNX call already fans out over EMBED_INTRA_OP_THREADS, so a couple of
+# concurrent calls saturate the CPU; extra requests queue here instead of
+# occupying the default to_thread pool that Postgres/Qdrant calls share
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "2"))
+
+# Vectors from a different model (or quantized export) must not be reused
+_MODEL_TAG = hashlib.sha256(f"{EMBED_MODEL_ID}:{EMBED_MODEL_FILE or ''}".encode()).hexdigest()[:12]
+# f16: values are float16 (half the bytes of float32; unit vectors lose ~1e-3 per component)
+KEY_PREFIX = f"emb:f16:{_MODEL_TAG}:"
+
+logger = logging.getLogger("redix.embed_cache")
+_redis_client = redis_async.Redis.from_url(REDIS_URL)
+_embed_executor = ThreadPoolExecutor(max_workers=EMBED_CONCURRENCY, thread_name_prefix="embed")
+# Process-local LRU in front of Redis, keyed by the text's SHA-256
+_local: OrderedDict[str, list[float]] = OrderedDict()
+
+
+def text_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def redis_key(digest: str) -> str:
+    return KEY_PREFIX + digest
+
+
+def encode_vector(vector) -> bytes:
+    return np.asarray(vector, dtype=np.float16).tobytes()
+
+
+def decode_vector(raw: bytes) -> list[float]:
+    return np.frombuffer(raw, dtype=np.float16).tolist()
+
+
+def _remember(digest: str, vector: list[float]) -> None:
+    _local[digest] = vector
+    if len(_local) > EMBED_CACHE_SIZE:
+        _local.popitem(last=False)
+
+
+async def cached_embed(text: str) -> list[float]:
+    """
+    embed_text with a per-process LRU and a Redis layer shared by all API
+    workers and the embed worker (see workers.embed.embed_batch).
+    Redis errors fall through to computing the embedding.
+    """
+    digest = text_digest(text)
+    vector = _local.get(digest)
+    if vector is not None:
+        _local.move_to_end(digest)
+        return vector
+
+    key = redis_key(digest)
+    try:
+        raw = await _redis_client.get(key)
+    except redis.RedisError as exc:
+        logger.warning("Embedding cache read failed: %s", exc)
+        raw = None
+
+    if raw is not None:
+        vector = decode_vector(raw)
+    else:
+        vector = await asyncio.get_running_loop().run_in_executor(_embed_executor, embed_text, text)
+        try:
+            await _redis_client.set(key, encode_vector(vector), ex=EMBED_CACHE_TTL_SECONDS)
+        except redis.RedisError as exc:
+            logger.warning("Embedding cache write failed: %s", exc)
+
+    _remember(digest, vector)
+    return vector
+
+
+async def close_cache_client() -> None:
+    """Release the Redis layer's connections on shutdown"""
+    await _redis_client.aclose()
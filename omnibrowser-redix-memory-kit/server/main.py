@@ -1,16 +1,31 @@
+import asyncio
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
 import logging
 import os
-import re
-from typing import Annotated, Any, Dict, Iterable, Literal, Mapping
-from uuid import uuid4
+from typing import Annotated, Any, Dict, Mapping
 
 from fastapi import Depends, FastAPI, Header, HTTPException
-from pydantic import BaseModel, Field, validator
+from fastapi.responses import ORJSONResponse
+import orjson
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from db import check_health, close_pg_pool, insert_memory_async, open_pg_pool, search_vectors  # type: ignore
+from embedding_cache import cached_embed, close_cache_client  # type: ignore
+from memory_queue import (  # type: ignore
+    close_queue_client,
+    enqueue_memory,
+    start_enqueue_flusher,
+    stop_enqueue_flusher,
+)
+from pii import SEVERITY_ORDER, detect_pii  # type: ignore
+import semantic_cache  # type: ignore
 
-from db import check_health, insert_memory, vector_search  # type: ignore
-from embed import embed_text  # type: ignore
-from memory_queue import enqueue_memory  # type: ignore
+try:
+    # Time-ordered ids keep primary-key inserts append-mostly instead of random B-tree pages
+    from uuid_utils import uuid7 as new_memory_id
+except ImportError:  # uuid-utils is optional
+    from uuid import uuid4 as new_memory_id
 
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
@@ -20,52 +35,37 @@ logging.basicConfig(
 )
 logger = logging.getLogger("redix.api")
 
+JWT_SECRET = os.getenv("JWT_SECRET", "dev-super-secret-change-in-prod")
+JWT_ALGORITHM = "HS256"
+ASYNC_EMBED = os.getenv("ASYNC_EMBED", "false").lower() in {"1", "true", "yes"}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_pg_pool()
+    if ASYNC_EMBED:
+        start_enqueue_flusher()
+    yield
+    await stop_enqueue_flusher()
+    await close_pg_pool()
+    await close_queue_client()
+    await close_cache_client()
+
+
 app = FastAPI(
     title="Redix Memory API",
     description="FastAPI service for Regen memory ingestion and recall.",
     version="0.1.0",
+    lifespan=lifespan,
+    # Responses are plain dicts/lists; orjson serializes them in one C call
+    default_response_class=ORJSONResponse,
 )
-
-JWT_SECRET = os.getenv("JWT_SECRET", "dev-super-secret-change-in-prod")
-JWT_ALGORITHM = "HS256"
-ASYNC_EMBED = os.getenv("ASYNC_EMBED", "false").lower() in {"1", "true", "yes"}
-ALLOWED_PROJECTS = {
+ALLOWED_PROJECTS = frozenset(
     project.strip()
     for project in os.getenv("ALLOWED_PROJECTS", "regen,redix").split(",")
     if project.strip()
-}
-
-Severity = Literal["low", "medium", "high"]
-
-PII_RULES: tuple[dict[str, Any], ...] = (
-    {
-        "label": "email",
-        "pattern": re.compile(r"[A-Z0-9._%+-]+@[A-Z0-9.-]+\.[A-Z]{2,}", re.IGNORECASE),
-        "severity": "low",
-    },
-    {
-        "label": "phone",
-        "pattern": re.compile(r"\+?\d[\d\s().-]{7,}\d"),
-        "severity": "medium",
-    },
-    {
-        "label": "ipv4",
-        "pattern": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
-        "severity": "medium",
-    },
-    {
-        "label": "ssn",
-        "pattern": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
-        "severity": "high",
-    },
-    {
-        "label": "credit_card",
-        "pattern": re.compile(r"\b(?:\d[ -]?){13,16}\b"),
-        "severity": "high",
-    },
 )
 
-SEVERITY_ORDER: dict[str, int] = {"none": 0, "low": 1, "medium": 2, "high": 3}
 PII_REJECT_SEVERITY = os.getenv("PII_REJECT_SEVERITY", "high").lower()
 if PII_REJECT_SEVERITY not in SEVERITY_ORDER:
     logger.warning("Invalid PII_REJECT_SEVERITY value '%s'; defaulting to 'high'", PII_REJECT_SEVERITY)
@@ -77,7 +77,7 @@ class AuthContext(BaseModel):
     user_id: str = "u42"
 
 
-def fake_auth(
+async def fake_auth(
     x_tenant: Annotated[str | None, Header(alias="x-tenant", default=None)] = None,
     x_user: Annotated[str | None, Header(alias="x-user", default=None)] = None,
 ) -> AuthContext:
@@ -92,6 +92,8 @@ def fake_auth(
 
 
 class MemoryWriteRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     project: str = Field(..., description="Project or namespace for the memory.")
     type: str = Field(default="tab", description="Memory item type (tab, note, chat, etc).")
     title: str | None = Field(default=None)
@@ -103,43 +105,24 @@ class MemoryWriteRequest(BaseModel):
     acl: dict[str, Any] | None = None
     pii: dict[str, Any] | None = None
 
-    @validator("text")
+    @field_validator("text")
+    @classmethod
     def ensure_text_not_empty(cls, value: str) -> str:
-        if not value.strip():
+        # isspace() stops at the first non-whitespace char instead of copying the text like strip()
+        if not value or value.isspace():
             raise ValueError("text field cannot be empty")
         return value
 
 
 class MemorySearchRequest(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
     query: str
     top_k: int | None = Field(default=10, ge=1, le=50)
     filters: dict[str, Any] | None = Field(default_factory=dict)
     with_sources: bool | None = False
 
 
-def _detect_pii(text: str) -> tuple[dict[str, dict[str, Any]], Severity | None]:
-    matches: dict[str, dict[str, Any]] = {}
-    highest: Severity | None = None
-    for rule in PII_RULES:
-        found = rule["pattern"].findall(text)
-        if not found:
-            continue
-        label = rule["label"]
-        severity: Severity = rule["severity"]
-        sample_raw = found[0]
-        if isinstance(sample_raw, Iterable) and not isinstance(sample_raw, (str, bytes)):
-            sample_raw = " ".join(str(part) for part in sample_raw)
-        sample = str(sample_raw)[:120]
-        matches[label] = {
-            "count": len(found),
-            "severity": severity,
-            "sample": sample,
-        }
-        if highest is None or SEVERITY_ORDER[severity] > SEVERITY_ORDER[highest]:
-            highest = severity
-    return matches, highest
-
-
 def _merge_pii(
     original: dict[str, Any] | None,
     detected: Mapping[str, dict[str, Any]],
@@ -169,14 +152,14 @@ def _merge_pii(
 
 
 @app.post("/v1/memory.write")
-def memory_write(
+async def memory_write(
     payload: MemoryWriteRequest,
     auth: AuthContext = Depends(fake_auth),
 ):
     """
     Ingest a memory item, embed it, and fan out to Postgres + Qdrant.
     """
-    memory_id = str(uuid4())
+    memory_id = str(new_memory_id())
     created_at = datetime.now(timezone.utc)
 
     if ALLOWED_PROJECTS and payload.project not in ALLOWED_PROJECTS:
@@ -186,7 +169,7 @@ def memory_write(
         )
         raise HTTPException(status_code=403, detail="Project not permitted")
 
-    pii_summary, highest_pii = _detect_pii(payload.text)
+    pii_summary, highest_pii = detect_pii(payload.text)
 
     if (
         highest_pii
@@ -226,17 +209,19 @@ def memory_write(
 
     if ASYNC_EMBED:
         try:
-            enqueue_memory(memory_data)
-            logger.info(
-                "Queued memory for async embedding",
-                extra={
-                    "id": memory_id,
-                    "project": payload.project,
-                    "tenant_id": auth.tenant_id,
-                    "text_length": len(payload.text),
-                    "pii_flags": list(pii_summary.keys()),
-                },
-            )
+            await enqueue_memory(memory_data)
+            # Skip building the extras dict when INFO is filtered out
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "Queued memory for async embedding",
+                    extra={
+                        "id": memory_id,
+                        "project": payload.project,
+                        "tenant_id": auth.tenant_id,
+                        "text_length": len(payload.text),
+                        "pii_flags": list(pii_summary.keys()),
+                    },
+                )
             return {"id": memory_id, "queued": True}
         except Exception as exc:  # Redis failure fallback
             logger.exception(
@@ -245,7 +230,8 @@ def memory_write(
             )
 
     try:
-        embedding = embed_text(payload.text)
+        # Repeated texts reuse a cached vector; misses run the model off the event loop
+        embedding = await cached_embed(payload.text)
     except Exception as exc:
         logger.exception(
             "Embedding failed",
@@ -257,7 +243,7 @@ def memory_write(
         ) from exc
 
     try:
-        insert_memory(**memory_data, embedding=embedding)
+        await insert_memory_async(**memory_data, embedding=embedding)
     except Exception as exc:
         logger.exception(
             "Failed to persist memory",
@@ -268,23 +254,24 @@ def memory_write(
             detail="Failed to persist memory",
         ) from exc
 
-    logger.info(
-        "Memory persisted",
-        extra={
-            "id": memory_id,
-            "project": payload.project,
-            "tenant_id": auth.tenant_id,
-            "text_length": len(payload.text),
-            "async": False,
-            "pii_flags": list(pii_summary.keys()),
-        },
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Memory persisted",
+            extra={
+                "id": memory_id,
+                "project": payload.project,
+                "tenant_id": auth.tenant_id,
+                "text_length": len(payload.text),
+                "async": False,
+                "pii_flags": list(pii_summary.keys()),
+            },
+        )
 
     return {"id": memory_id}
 
 
 @app.post("/v1/memory.search")
-def memory_search(
+async def memory_search(
     payload: MemorySearchRequest,
     auth: AuthContext = Depends(fake_auth),
 ):
@@ -294,13 +281,17 @@ def memory_search(
     filters = payload.filters or {}
     filters.setdefault("tenant_id", auth.tenant_id)
 
+    top_k = payload.top_k or 10
+    with_sources = payload.with_sources or False
     try:
-        results = vector_search(
-            query=payload.query,
-            top_k=payload.top_k or 10,
-            filters=filters,
-            with_sources=payload.with_sources or False,
-        )
+        vector = await cached_embed(payload.query)
+        # Near-identical queries with the same scope reuse recent results
+        namespace = orjson.dumps([filters, top_k, with_sources], option=orjson.OPT_SORT_KEYS)
+        results = semantic_cache.lookup(namespace, vector) if semantic_cache.SEMANTIC_CACHE_ENABLED else None
+        if results is None:
+            results = await asyncio.to_thread(search_vectors, vector, top_k, filters, with_sources)
+            if semantic_cache.SEMANTIC_CACHE_ENABLED:
+                semantic_cache.store(namespace, vector, results)
     except Exception as exc:
         logger.exception(
             "Vector search failed",
@@ -308,15 +299,16 @@ def memory_search(
         )
         raise HTTPException(status_code=500, detail="Search failed") from exc
 
-    logger.info(
-        "Search completed",
-        extra={
-            "tenant_id": auth.tenant_id,
-            "project_filter": filters.get("project"),
-            "result_count": len(results),
-            "query_length": len(payload.query),
-        },
-    )
+    if logger.isEnabledFor(logging.INFO):
+        logger.info(
+            "Search completed",
+            extra={
+                "tenant_id": auth.tenant_id,
+                "project_filter": filters.get("project"),
+                "result_count": len(results),
+                "query_length": len(payload.query),
+            },
+        )
 
     return {"results": results}
 
@@ -1,63 +1,157 @@
-import json
+import asyncio
 import logging
 import os
 from datetime import datetime, timezone
 from typing import Any
 
+import orjson
 import redis
+from redis import asyncio as redis_async
 
 
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 STREAM_KEY = os.getenv("EMBED_STREAM", "memory:queue")
+# Pre-encoded so redis-py doesn't UTF-8 encode the key/empty values on every XADD
+STREAM_KEY_B = STREAM_KEY.encode()
+EMPTY = b""
+# Concurrent enqueues are coalesced into one pipelined round trip per batch
+ENQUEUE_BATCH_SIZE = int(os.getenv("EMBED_ENQUEUE_BATCH", "64"))
+ENQUEUE_WINDOW_SECONDS = float(os.getenv("EMBED_ENQUEUE_WINDOW_MS", "10")) / 1000
+# Approximate cap (XADD MAXLEN ~); 0 (default) disables. Entries past it are trimmed even if
+# the embed worker has not consumed them yet, so only set it when losing a backlog is acceptable
+STREAM_MAXLEN = int(os.getenv("EMBED_STREAM_MAXLEN", "0")) or None
 
 logger = logging.getLogger("redix.queue")
-_redis_client = redis.Redis.from_url(REDIS_URL)
+_redis_client = redis_async.Redis.from_url(REDIS_URL)
 
+_pending: asyncio.Queue | None = None
+_flush_task: asyncio.Task | None = None
+_STOP = object()  # Queued last on shutdown so the flusher pushes everything before it
 
-def enqueue_memory(data: dict[str, Any]) -> None:
+
+async def _xadd_batch(batch: list[tuple[dict[bytes, Any], asyncio.Future]]) -> None:
+    """XADD every entry in one pipeline and resolve each caller's future with its own result."""
+    try:
+        pipe = _redis_client.pipeline(transaction=False)
+        for fields, _ in batch:
+            pipe.xadd(STREAM_KEY_B, fields, maxlen=STREAM_MAXLEN, approximate=True)
+        results = await pipe.execute(raise_on_error=False)
+    except Exception as exc:  # any failure must still resolve every waiting caller
+        results = [exc] * len(batch)
+    for (_, future), result in zip(batch, results):
+        if future.done():  # caller went away
+            continue
+        if isinstance(result, Exception):
+            future.set_exception(result)
+        else:
+            future.set_result(result)
+
+
+async def _flush_loop(queue: asyncio.Queue) -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await queue.get()]
+        deadline = loop.time() + ENQUEUE_WINDOW_SECONDS
+        while len(batch) < ENQUEUE_BATCH_SIZE and batch[-1] is not _STOP:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        stopping = batch[-1] is _STOP
+        if stopping:
+            batch.pop()
+        if batch:
+            await _xadd_batch(batch)
+        if stopping:
+            return
+
+
+def start_enqueue_flusher() -> asyncio.Task:
+    """Start batching enqueue_memory calls; until then each call does its own XADD."""
+    global _pending, _flush_task
+    if _flush_task is None:
+        _pending = asyncio.Queue()
+        _flush_task = asyncio.create_task(_flush_loop(_pending))
+    return _flush_task
+
+
+async def stop_enqueue_flusher() -> None:
+    """
+    Push whatever is still queued and stop the flusher. The in-flight batch is
+    never cancelled, so every waiting caller gets its XADD result; calls made
+    from here on do their own XADD.
+    """
+    global _pending, _flush_task
+    if _flush_task is None:
+        return
+    task, queue = _flush_task, _pending
+    _flush_task = _pending = None
+    queue.put_nowait(_STOP)
+    await task
+
+
+async def close_queue_client() -> None:
+    """Release the stream client's connections (after stop_enqueue_flusher)"""
+    await _redis_client.aclose()
+
+
+async def enqueue_memory(data: dict[str, Any]) -> None:
     """
     Push a memory payload onto the Redis stream for async embedding.
+    Returns once the entry is in the stream, so Redis errors still reach the caller.
     """
-    payload = data.copy()
-    created_at = payload.get("created_at")
+    created_at = data.get("created_at")
     if isinstance(created_at, datetime):
-        payload["created_at"] = created_at.astimezone(timezone.utc).isoformat()
+        created_at = created_at.astimezone(timezone.utc).isoformat()
     elif not created_at:
-        payload["created_at"] = datetime.now(timezone.utc).isoformat()
+        created_at = datetime.now(timezone.utc).isoformat()
 
+    # Built straight from data (no intermediate copy); data itself is left untouched.
+    # JSON columns go out as orjson bytes, which redis-py writes without re-encoding;
+    # created_at stays a bare ISO string because the worker parses it with fromisoformat.
+    # Field names are bytes literals (constants) so redis-py sends them without encoding
     fields = {
-        "id": payload["id"],
-        "tenant_id": payload["tenant_id"],
-        "user_id": payload["user_id"],
-        "project": payload["project"],
-        "type": payload.get("type", "tab"),
-        "title": payload.get("title") or "",
-        "text": payload["text"],
-        "mode": payload.get("mode") or "",
-        "tags": json.dumps(payload.get("tags", [])),
-        "origin": json.dumps(payload.get("origin")),
-        "rich": json.dumps(payload.get("rich")),
-        "acl": json.dumps(payload.get("acl")),
-        "pii": json.dumps(payload.get("pii")),
-        "created_at": payload["created_at"],
+        b"id": data["id"],
+        b"tenant_id": data["tenant_id"],
+        b"user_id": data["user_id"],
+        b"project": data["project"],
+        b"type": data.get("type", "tab"),
+        b"title": data.get("title") or EMPTY,
+        b"text": data["text"],
+        b"mode": data.get("mode") or EMPTY,
+        b"tags": orjson.dumps(data.get("tags", [])),
+        b"origin": orjson.dumps(data.get("origin")),
+        b"rich": orjson.dumps(data.get("rich")),
+        b"acl": orjson.dumps(data.get("acl")),
+        b"pii": orjson.dumps(data.get("pii")),
+        b"created_at": created_at,
     }
 
     try:
-        _redis_client.xadd(STREAM_KEY, fields)
-        logger.info(
-            "Enqueued memory",
-            extra={
-                "id": payload["id"],
-                "project": payload["project"],
-                "tenant_id": payload["tenant_id"],
-            },
-        )
+        if _flush_task is None:
+            await _redis_client.xadd(STREAM_KEY_B, fields, maxlen=STREAM_MAXLEN, approximate=True)
+        else:
+            future = asyncio.get_running_loop().create_future()
+            _pending.put_nowait((fields, future))
+            await future
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "Enqueued memory",
+                extra={
+                    "id": data["id"],
+                    "project": data["project"],
+                    "tenant_id": data["tenant_id"],
+                },
+            )
     except redis.RedisError as exc:
         logger.exception(
             "Failed to enqueue memory",
             extra={
-                "id": payload.get("id"),
-                "project": payload.get("project"),
+                "id": data["id"],
+                "project": data["project"],
                 "error": str(exc),
             },
         )
@@ -0,0 +1,153 @@
+"""
+PII detection for memory writes: regex rules per PII kind, an optional
+Hyperscan prefilter, and Unicode folding so non-ASCII digits can't bypass them.
+Kept free of the service's storage/embedding imports so it can be tested alone.
+"""
+
+import logging
+import unicodedata
+from typing import Any, Iterable, Literal
+
+try:
+    import re2 as re  # linear-time matching, no backtracking on long texts
+except ImportError:  # google-re2 is optional
+    import re
+
+try:
+    import hyperscan
+except ImportError:  # hyperscan is optional; each PII rule then scans the text itself
+    hyperscan = None
+
+
+logger = logging.getLogger("redix.pii")
+
+Severity = Literal["low", "medium", "high"]
+
+PII_RULES: tuple[dict[str, Any], ...] = (
+    {
+        "label": "email",
+        "pattern": re.compile(r"[A-Za-z0-9._%+\-]+@[A-Za-z0-9.\-]+\.[A-Za-z]{2,}"),
+        "severity": "low",
+    },
+    {
+        "label": "phone",
+        "pattern": re.compile(r"\+?\d[\d\s().-]{7,}\d"),
+        "severity": "medium",
+    },
+    {
+        "label": "ipv4",
+        "pattern": re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b"),
+        "severity": "medium",
+    },
+    {
+        "label": "ssn",
+        "pattern": re.compile(r"\b\d{3}-\d{2}-\d{4}\b"),
+        "severity": "high",
+    },
+    {
+        "label": "credit_card",
+        "pattern": re.compile(r"\b(?:\d[ -]?){13,16}\b"),
+        "severity": "high",
+    },
+)
+
+
+def _compile_pii_prefilter():
+    """
+    One Hyperscan database over every PII rule. A single pass over the text
+    tells which rules match at all; only those are re-run for counts and
+    samples, so clean text is read once instead of once per rule. Like the
+    rules themselves it only sees text after normalize_for_pii, since
+    Hyperscan's \\d is ASCII-only as well.
+    """
+    if hyperscan is None:
+        return None
+    try:
+        database = hyperscan.Database()
+        database.compile(
+            expressions=[rule["pattern"].pattern.encode() for rule in PII_RULES],
+            ids=list(range(len(PII_RULES))),
+            elements=len(PII_RULES),
+            flags=[hyperscan.HS_FLAG_SINGLEMATCH] * len(PII_RULES),
+        )
+        return database
+    except hyperscan.error as exc:
+        logger.warning("Failed to compile PII prefilter; scanning rules individually: %s", exc)
+        return None
+
+
+# Scanned only from the event loop thread, so the database's single scratch space is safe
+PII_PREFILTER = _compile_pii_prefilter()
+
+
+def _on_pii_prefilter_match(rule_id: int, start: int, end: int, flags: int, matched: set[int]) -> None:
+    matched.add(rule_id)
+
+
+class _AsciiDigits(dict):
+    """
+    str.translate table folding every Unicode decimal digit (Arabic-Indic,
+    Devanagari, ...) to its ASCII digit; filled lazily per code point seen.
+    """
+
+    def __missing__(self, codepoint: int) -> int | str:
+        digit = unicodedata.decimal(chr(codepoint), None)
+        self[codepoint] = mapped = codepoint if digit is None else str(digit)
+        return mapped
+
+
+_ASCII_DIGITS = _AsciiDigits()
+
+
+def normalize_for_pii(text: str) -> str:
+    """
+    re2 and Hyperscan only treat ASCII as \\d/\\s/\\b, so full-width or other-script
+    digits would slip past the rules. NFKC folds full-width digits and spaces;
+    the translate table covers decimal digits NFKC leaves alone.
+    """
+    if text.isascii():
+        return text
+    return unicodedata.normalize("NFKC", text).translate(_ASCII_DIGITS)
+
+
+# Shortest text any PII rule can match (an email like a@b.co); shorter texts skip the scan
+MIN_PII_SCAN_LEN = 6
+
+SEVERITY_ORDER: dict[str, int] = {"none": 0, "low": 1, "medium": 2, "high": 3}
+# (label, severity, rank, bound finditer) per rule, resolved once instead of per write
+_PII_SCANNERS: tuple[tuple[str, Severity, int, Any], ...] = tuple(
+    (rule["label"], rule["severity"], SEVERITY_ORDER[rule["severity"]], rule["pattern"].finditer)
+    for rule in PII_RULES
+)
+
+
+def detect_pii(text: str) -> tuple[dict[str, dict[str, Any]], Severity | None]:
+    matches: dict[str, dict[str, Any]] = {}
+    highest: Severity | None = None
+    text = normalize_for_pii(text)
+    if len(text) < MIN_PII_SCAN_LEN:
+        return matches, highest
+    highest_rank = 0
+    scanners: Iterable[tuple[str, Severity, int, Any]] = _PII_SCANNERS
+    if PII_PREFILTER is not None:
+        matched: set[int] = set()
+        PII_PREFILTER.scan(text.encode("utf-8"), match_event_handler=_on_pii_prefilter_match, context=matched)
+        scanners = [_PII_SCANNERS[rule_id] for rule_id in sorted(matched)]
+    for label, severity, rank, finditer in scanners:
+        # Count with finditer instead of materializing every match via findall
+        count = 0
+        sample = ""
+        for match in finditer(text):
+            if not count:
+                sample = match.group(0)[:120]
+            count += 1
+        if not count:
+            continue
+        matches[label] = {
+            "count": count,
+            "severity": severity,
+            "sample": sample,
+        }
+        if rank > highest_rank:
+            highest, highest_rank = severity, rank
+    return matches, highest
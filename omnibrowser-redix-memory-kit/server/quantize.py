@@ -0,0 +1,35 @@
+"""
+Export the embedding model to ONNX and quantize it to dynamic int8 for CPU inference.
+
+    python quantize.py models/bge-small-en-v1.5-int8
+
+Then set EMBED_MODEL to that directory and EMBED_MODEL_FILE=model_quantized.onnx.
+"""
+
+import logging
+import sys
+
+from optimum.onnxruntime import ORTModelForFeatureExtraction, ORTQuantizer
+from optimum.onnxruntime.configuration import AutoQuantizationConfig
+from transformers import AutoTokenizer
+
+SOURCE_MODEL_ID = "BAAI/bge-small-en-v1.5"
+logger = logging.getLogger("redix.quantize")
+
+
+def quantize(save_dir: str, model_id: str = SOURCE_MODEL_ID) -> None:
+    model = ORTModelForFeatureExtraction.from_pretrained(model_id, export=True)
+    model.save_pretrained(save_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(save_dir)
+
+    # Dynamic int8 needs no calibration set; per-channel weights keep the accuracy loss small
+    qconfig = AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=True)
+    ORTQuantizer.from_pretrained(model).quantize(save_dir=save_dir, quantization_config=qconfig)
+    logger.info("Wrote %s/model_quantized.onnx", save_dir)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        sys.exit("usage: python quantize.py <save_dir>")
+    quantize(sys.argv[1])
@@ -0,0 +1,63 @@
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any
+
+import numpy as np
+
+
+# 0 disables the cache; results can be this many seconds stale after a write
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", "0"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.95"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "64"))  # entries per namespace
+SEMANTIC_CACHE_NAMESPACES = int(os.getenv("SEMANTIC_CACHE_NAMESPACES", "128"))
+SEMANTIC_CACHE_ENABLED = SEMANTIC_CACHE_TTL_SECONDS > 0
+
+logger = logging.getLogger("redix.semantic_cache")
+
+
+class _Namespace:
+    """Ring buffer of recent query vectors and their results; one per tenant/filter combination."""
+
+    def __init__(self, dim: int) -> None:
+        self.vectors = np.zeros((SEMANTIC_CACHE_SIZE, dim), dtype=np.float32)
+        self.expires_at = np.zeros(SEMANTIC_CACHE_SIZE)
+        self.results: list[Any] = [None] * SEMANTIC_CACHE_SIZE
+        self.next_slot = 0
+
+
+# Least recently used namespaces are dropped past SEMANTIC_CACHE_NAMESPACES
+_namespaces: OrderedDict[bytes, _Namespace] = OrderedDict()
+
+
+def lookup(namespace: bytes, vector: list[float]) -> list[dict[str, Any]] | None:
+    """
+    Results of a recent query whose embedding is within SEMANTIC_CACHE_THRESHOLD
+    cosine similarity of vector, or None. Embeddings are unit length, so a dot
+    product against the whole buffer scores every entry at once.
+    """
+    entries = _namespaces.get(namespace)
+    if entries is None:
+        return None
+    _namespaces.move_to_end(namespace)
+    scores = entries.vectors @ np.asarray(vector, dtype=np.float32)
+    scores[entries.expires_at < time.monotonic()] = -1.0
+    best = int(scores.argmax())
+    if scores[best] < SEMANTIC_CACHE_THRESHOLD:
+        return None
+    logger.debug("Semantic cache hit (similarity %.3f)", scores[best])
+    return entries.results[best]
+
+
+def store(namespace: bytes, vector: list[float], results: list[dict[str, Any]]) -> None:
+    entries = _namespaces.get(namespace)
+    if entries is None:
+        entries = _namespaces[namespace] = _Namespace(len(vector))
+        if len(_namespaces) > SEMANTIC_CACHE_NAMESPACES:
+            _namespaces.popitem(last=False)
+    slot = entries.next_slot
+    entries.vectors[slot] = vector
+    entries.expires_at[slot] = time.monotonic() + SEMANTIC_CACHE_TTL_SECONDS
+    entries.results[slot] = results
+    entries.next_slot = (slot + 1) % SEMANTIC_CACHE_SIZE
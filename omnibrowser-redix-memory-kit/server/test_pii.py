@@ -0,0 +1,26 @@
+from pii import detect_pii
+
+
+def test_detects_ascii_ssn_and_credit_card():
+    matches, highest = detect_pii("ssn 123-45-6789 card 4111 1111 1111 1111")
+    assert highest == "high"
+    assert {"ssn", "credit_card"} <= matches.keys()
+
+
+def test_detects_full_width_digits():
+    matches, highest = detect_pii("ssn １２３-４５-６７８９")
+    assert highest == "high"
+    assert matches["ssn"]["sample"] == "123-45-6789"
+
+
+def test_detects_other_script_digits():
+    # Arabic-Indic and Devanagari digits are untouched by NFKC
+    matches, highest = detect_pii("card ٤١١١ ١١١١ ١١١١ ١١١١ and ssn १२३-४५-६७८९")
+    assert highest == "high"
+    assert {"ssn", "credit_card"} <= matches.keys()
+
+
+def test_clean_non_ascii_text_has_no_pii():
+    matches, highest = detect_pii("Café résumé notes — nothing sensitive here")
+    assert matches == {}
+    assert highest is None
@@ -6,7 +6,8 @@ from datetime import datetime, timezone
 
 import redis
 
-from embed import embed_text
+from embed import embed_text, embed_texts
+from embedding_cache import EMBED_CACHE_TTL_SECONDS, decode_vector, encode_vector, redis_key, text_digest
 from db import insert_memory
 
 logging.basicConfig(level=logging.INFO)
@@ -16,6 +17,9 @@ REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 STREAM_KEY = os.getenv("EMBED_STREAM", "memory:queue")
 GROUP_NAME = os.getenv("EMBED_GROUP", "embed-workers")
 CONSUMER_NAME = os.getenv("HOSTNAME", "consumer-1")
+# Entries per XREADGROUP; each batch is embedded in one forward pass
+BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "32"))
+BLOCK_MS = int(os.getenv("EMBED_BLOCK_MS", "5000"))
 
 r = redis.Redis.from_url(REDIS_URL)
 
@@ -28,7 +32,64 @@ def ensure_group() -> None:
             raise
 
 
-def process_message(message_id: str, fields: dict[str, bytes]) -> None:
+def consume_batch(count: int = BATCH_SIZE, block_ms: int = BLOCK_MS) -> list:
+    """Read up to count new entries for this consumer; returns [(message_id, fields), ...]."""
+    resp = r.xreadgroup(
+        GROUP_NAME,
+        CONSUMER_NAME,
+        {STREAM_KEY: ">"},
+        count=count,
+        block=block_ms,
+    )
+    return [message for _, messages in resp or () for message in messages]
+
+
+def embed_batch(messages: list) -> list:
+    """
+    Embed every message's text in one batched forward pass.
+    Vectors already in the shared Redis embedding cache (one MGET) are reused;
+    the rest are embedded together and written back in one pipeline.
+    Returns one embedding (or None) per message; None makes process_message embed on its own.
+    """
+    texts = [fields.get(b"text", b"").decode("utf-8") for _, fields in messages]
+    indexes = [idx for idx, text in enumerate(texts) if text]
+    embeddings: list = [None] * len(messages)
+    if not indexes:
+        return embeddings
+
+    keys = [redis_key(text_digest(texts[idx])) for idx in indexes]
+    try:
+        cached = r.mget(keys)
+    except redis.RedisError as exc:  # pragma: no cover
+        logger.warning("Embedding cache read failed: %s", exc)
+        cached = [None] * len(keys)
+    misses = []
+    for idx, key, raw in zip(indexes, keys, cached):
+        if raw is None:
+            misses.append((idx, key))
+        else:
+            embeddings[idx] = decode_vector(raw)
+    if not misses:
+        return embeddings
+
+    try:
+        vectors = embed_texts([texts[idx] for idx, _ in misses])
+    except Exception as exc:  # pragma: no cover
+        logger.warning("Batch embedding failed, falling back to per-message: %s", exc)
+        return embeddings
+    pipe = r.pipeline(transaction=False)
+    # One tolist() for the whole matrix instead of one per row
+    for (idx, key), vector, row in zip(misses, vectors, vectors.tolist()):
+        embeddings[idx] = row
+        pipe.set(key, encode_vector(vector), ex=EMBED_CACHE_TTL_SECONDS)
+    try:
+        pipe.execute()
+    except redis.RedisError as exc:  # pragma: no cover
+        logger.warning("Embedding cache write failed: %s", exc)
+    return embeddings
+
+
+def process_message(message_id: str, fields: dict[str, bytes], embedding: list[float] | None = None) -> None:
     def _decode(key: bytes, default: str = "") -> str:
         value = fields.get(key, b"")
         return value.decode("utf-8") if value else default
@@ -38,7 +99,8 @@ def process_message(message_id: str, fields: dict[str, bytes]) -> None:
         logger.warning("Skipping message %s without text field", message_id)
         return
 
-    embedding = embed_text(text)
+    if embedding is None:
+        embedding = embed_text(text)
 
     required_fields = {
         "id": _decode(b"id"),
@@ -88,22 +150,16 @@ def loop() -> None:
     logger.info("Embed worker listening on stream %s", STREAM_KEY)
     while True:
         try:
-            resp = r.xreadgroup(
-                GROUP_NAME,
-                CONSUMER_NAME,
-                {STREAM_KEY: ">"},
-                count=10,
-                block=5000,
-            )
-            if not resp:
+            messages = consume_batch()
+            if not messages:
                 continue
-            for _, messages in resp:
-                for message_id, fields in messages:
-                    try:
-                        process_message(message_id, fields)
-                        r.xack(STREAM_KEY, GROUP_NAME, message_id)
-                    except Exception as exc:  # pragma: no cover
-                        logger.exception("Failed to process %s: %s", message_id, exc)
+            embeddings = embed_batch(messages)
+            for (message_id, fields), embedding in zip(messages, embeddings):
+                try:
+                    process_message(message_id, fields, embedding)
+                    r.xack(STREAM_KEY, GROUP_NAME, message_id)
+                except Exception as exc:  # pragma: no cover
+                    logger.exception("Failed to process %s: %s", message_id, exc)
         except redis.RedisError as exc:  # pragma: no cover
             logger.exception("Redis error: %s", exc)
             time.sleep(5)
@@ -156,7 +156,12 @@ export class AIEngine {
                 return { text: tokens.join(''), provider: 'openai', model: 'unknown' };
               }
             } else if (event.startsWith('data:')) {
-              const token = event.replace('data:', '').trim();
+              // Multi-line text arrives as one data: line per line of text
+              const token = event
+                .split('\n')
+                .map(line => line.replace(/^data: ?/, ''))
+                .join('\n')
+                .trim();
               tokens.push(token);
               onStream?.({ type: 'token', data: token });
             }